@@ -17,7 +17,48 @@ $(document).ready(function () {
         };
     }
 
-    function fetchGoldPrices(callback) {
+    // Pre-aggregated snapshots published by the scraper (docs/data/snapshots).
+    // Falls back to reading the whole table from Supabase when missing.
+    const SNAPSHOT_BASE = 'data/snapshots/';
+    const snapshotCache = {};
+    let snapshotSummary = null;
+    let useSnapshots = true;
+
+    function fetchJson(url) {
+        return fetch(url).then(function (response) {
+            if (!response.ok) {
+                throw new Error(url + ': HTTP ' + response.status);
+            }
+            return response.json();
+        });
+    }
+
+    function decodeSnapshot(snapshot) {
+        const rows = new Array(snapshot.date.length);
+        for (let i = 0; i < snapshot.date.length; i++) {
+            rows[i] = {
+                date: snapshot.date[i],
+                source: snapshot.sources[snapshot.source[i]],
+                purity: snapshot.purity,
+                price_per_gm: snapshot.price_per_gm[i],
+                created_dt: snapshot.created_dt[i],
+                modified_dt: snapshot.modified_dt[i],
+            };
+        }
+        // Newest first, matching the Supabase query order
+        return rows.reverse();
+    }
+
+    function loadSnapshot(purity, range) {
+        // Custom ranges are cut from the all-time snapshot in the browser
+        const file = purity + '-' + (range === 'custom' ? 'all' : range) + '.json';
+        if (!snapshotCache[file]) {
+            snapshotCache[file] = fetchJson(SNAPSHOT_BASE + file).then(decodeSnapshot);
+        }
+        return snapshotCache[file];
+    }
+
+    function fetchGoldPricesFromSupabase(callback) {
         const publishableKey =
             window.SUPABASE_PUBLISHABLE_KEY || window.SUPABASE_ANON_KEY;
         if (!window.SUPABASE_URL || !publishableKey) {
@@ -34,6 +75,7 @@ $(document).ready(function () {
         client
             .from('gold_prices')
             .select('*')
+            .eq('region', '')
             .order('date', { ascending: false })
             .then(function (result) {
                 if (result.error) {
@@ -46,6 +88,25 @@ $(document).ready(function () {
             });
     }
 
+    function fetchGoldPrices(callback) {
+        const purity = $('.tab-btn.active').data('purity') || '24K';
+        const range = $('.time-btn.active').data('range') || 'this-month';
+        Promise.all([
+            fetchJson(SNAPSHOT_BASE + 'summary.json'),
+            loadSnapshot(purity, range),
+        ])
+            .then(function (results) {
+                snapshotSummary = results[0];
+                goldData = results[1];
+                callback({ data: goldData });
+            })
+            .catch(function (error) {
+                console.warn('Snapshots unavailable, reading Supabase', error);
+                useSnapshots = false;
+                fetchGoldPricesFromSupabase(callback);
+            });
+    }
+
     let table;
     $('#gold-prices-table').DataTable({
         ajax: function (_data, callback, _settings) {
@@ -81,7 +142,7 @@ $(document).ready(function () {
         initComplete: function () {
             table = this.api();
             initChart(goldData);
-            refreshView();
+            renderView();
         }
     });
 
@@ -128,6 +189,24 @@ $(document).ready(function () {
     });
 
     function refreshView() {
+        if (!useSnapshots) {
+            renderView();
+            return;
+        }
+        const purity = $('.tab-btn.active').data('purity');
+        const range = $('.time-btn.active').data('range');
+        loadSnapshot(purity, range)
+            .then(function (rows) {
+                goldData = rows;
+                table.clear().rows.add(rows);
+                renderView();
+            })
+            .catch(function (error) {
+                console.error(error);
+            });
+    }
+
+    function renderView() {
         const purity = $('.tab-btn.active').data('purity');
         const range = $('.time-btn.active').data('range');
 
@@ -180,6 +259,12 @@ $(document).ready(function () {
     }
 
     function updateHistoricalStats(data, purity) {
+        if (useSnapshots && snapshotSummary) {
+            const stats = snapshotSummary.purities[purity];
+            if (stats) renderStats(stats, purity);
+            return;
+        }
+
         const filtered = data.filter(item => item.purity === purity);
         if (filtered.length === 0) return;
 
@@ -197,22 +282,29 @@ $(document).ready(function () {
         thirtyDaysAgo.setDate(now.getDate() - 30);
 
         const last30Days = filtered.filter(item => new Date(item.date) >= thirtyDaysAgo);
+        const prices30 = last30Days.map(item => item.price_per_gm);
+
+        renderStats({
+            current: {
+                date: currentItem.date,
+                source: currentItem.source,
+                price_per_gm: currentItem.price_per_gm,
+                updated_dt: currentItem.modified_dt || currentItem.created_dt,
+            },
+            high_30d: prices30.length > 0 ? Math.max(...prices30) : null,
+            low_30d: prices30.length > 0 ? Math.min(...prices30) : null,
+        }, purity);
+    }
 
-        let thirtyDayLow = { price_per_gm: 'N/A' };
-        let thirtyDayHigh = { price_per_gm: 'N/A' };
-
-        if (last30Days.length > 0) {
-            const sorted30 = [...last30Days].sort((a, b) => a.price_per_gm - b.price_per_gm);
-            thirtyDayLow = sorted30[0];
-            thirtyDayHigh = sorted30[sorted30.length - 1];
-        }
+    function renderStats(stats, purity) {
+        const currentItem = stats.current;
 
         // Update DOM
         $('#current-price').text('₹' + currentItem.price_per_gm.toLocaleString('en-IN'));
         $('#current-source').text(currentItem.source);
         $('#current-date').text(new Date(currentItem.date).toLocaleDateString('en-IN', { day: '2-digit', month: 'short', year: 'numeric' }));
 
-        const timestamp = currentItem.modified_dt || currentItem.created_dt;
+        const timestamp = currentItem.updated_dt;
         if (timestamp) {
             const time = new Date(timestamp);
             $('#current-time').text('Refreshed: ' + time.toLocaleString());
@@ -220,10 +312,10 @@ $(document).ready(function () {
             $('#current-time').text('');
         }
 
-        $('#30-day-high').text(thirtyDayHigh.price_per_gm !== 'N/A' ? '₹' + thirtyDayHigh.price_per_gm.toLocaleString('en-IN') : 'N/A');
+        $('#30-day-high').text(stats.high_30d !== null ? '₹' + stats.high_30d.toLocaleString('en-IN') : 'N/A');
         $('#month-high-purity').text(purity + ' Gold');
 
-        $('#30-day-low').text(thirtyDayLow.price_per_gm !== 'N/A' ? '₹' + thirtyDayLow.price_per_gm.toLocaleString('en-IN') : 'N/A');
+        $('#30-day-low').text(stats.low_30d !== null ? '₹' + stats.low_30d.toLocaleString('en-IN') : 'N/A');
         $('#month-low-purity').text(purity + ' Gold');
     }
 
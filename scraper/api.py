@@ -0,0 +1,388 @@
+"""Local read-only HTTP API over the gold_prices mirror.
+
+Prices are loaded once from the local mirror (see scraper.db) into an
+in-memory index of per-series sorted dates, and kept current by syncing
+the mirror in the background: every row a sync (or an upsert in this
+process) writes is applied to the index, and only cached responses whose
+purity, source, region and date range cover a changed row are dropped.
+
+    python -m scraper.api [--port 8787] [--refresh 60] [--no-sync]
+
+Endpoints (JSON; ``region`` defaults to the headline rows, ``''``):
+
+    GET /prices/latest?purity=24K[&source=...&region=...]
+    GET /prices/range?start=2026-01-01[&end=...&purity=...&source=...]
+    GET /prices/series?source=Tanishq&purity=24K[&start=...&end=...]
+    GET /health
+"""
+
+import json
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8787
+DEFAULT_REFRESH_SECONDS = 60
+RESPONSE_CACHE_SIZE = 256
+
+
+class PriceIndex:
+    """Prices keyed by (purity, source, date), one sorted series per region.
+
+    Each (purity, source, region) series holds parallel lists of ISO dates
+    and prices, so latest values, date ranges and whole series are bisects
+    and slices rather than scans of the table.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._series: dict[tuple[str, str, str], tuple[list[str], list[int]]] = {}
+
+    def load(self, rows) -> None:
+        """Replace the index with rows sorted by purity, source, region, date."""
+        series = {}
+        for row in rows:
+            key = (row["purity"], row["source"], row["region"] or "")
+            dates, prices = series.setdefault(key, ([], []))
+            dates.append(row["date"])
+            prices.append(row["price_per_gm"])
+        with self._lock:
+            self._series = series
+
+    def apply(self, rows) -> set[tuple[str, str, str, str]]:
+        """Insert or update rows; return the (purity, source, region, date) changed."""
+        changed = set()
+        with self._lock:
+            for row in rows:
+                key = (row["purity"], row["source"], row.get("region") or "")
+                dates, prices = self._series.setdefault(key, ([], []))
+                index = bisect_left(dates, row["date"])
+                if index < len(dates) and dates[index] == row["date"]:
+                    if prices[index] == row["price_per_gm"]:
+                        continue
+                    prices[index] = row["price_per_gm"]
+                else:
+                    dates.insert(index, row["date"])
+                    prices.insert(index, row["price_per_gm"])
+                changed.add((*key, row["date"]))
+        return changed
+
+    def _matching(self, purity, source, region):
+        for (s_purity, s_source, s_region), series in self._series.items():
+            if (
+                (purity is None or s_purity == purity)
+                and (source is None or s_source == source)
+                and s_region == region
+            ):
+                yield s_purity, s_source, series
+
+    def latest(self, purity=None, source=None, region="") -> list[dict]:
+        """The newest price of each matching series."""
+        with self._lock:
+            return [
+                {
+                    "purity": s_purity,
+                    "source": s_source,
+                    "date": dates[-1],
+                    "price_per_gm": prices[-1],
+                }
+                for s_purity, s_source, (dates, prices) in sorted(
+                    self._matching(purity, source, region)
+                )
+                if dates
+            ]
+
+    def range(self, start=None, end=None, purity=None, source=None, region=""):
+        """Rows of the matching series dated within [start, end], by date."""
+        rows = []
+        with self._lock:
+            for s_purity, s_source, (dates, prices) in self._matching(
+                purity, source, region
+            ):
+                lo = bisect_left(dates, start) if start else 0
+                hi = bisect_right(dates, end) if end else len(dates)
+                rows.extend(
+                    {
+                        "date": dates[i],
+                        "purity": s_purity,
+                        "source": s_source,
+                        "price_per_gm": prices[i],
+                    }
+                    for i in range(lo, hi)
+                )
+        rows.sort(key=lambda row: (row["date"], row["purity"], row["source"]))
+        return rows
+
+    def series(self, source, purity, start=None, end=None, region="") -> dict:
+        """One series as parallel date and price arrays."""
+        with self._lock:
+            dates, prices = self._series.get((purity, source, region), ([], []))
+            lo = bisect_left(dates, start) if start else 0
+            hi = bisect_right(dates, end) if end else len(dates)
+            return {"dates": dates[lo:hi], "prices": prices[lo:hi]}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(dates) for dates, _ in self._series.values())
+
+
+class ResponseCache:
+    """LRU cache of encoded responses, each tagged with the rows it covers.
+
+    The scope of an entry is (purity, source, region, start, end), None
+    meaning any purity or source and an open range end. ``generation``
+    counts invalidations, so a response computed while rows changed can
+    be left out of the cache.
+    """
+
+    def __init__(self, maxsize: int = RESPONSE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[tuple, bytes]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(
+        self, key: str, scope: tuple, body: bytes, generation: int | None = None
+    ) -> bool:
+        """Cache ``body``, unless rows changed since ``generation`` was read."""
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return False
+            self._entries[key] = (scope, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            return True
+
+    def invalidate(self, changed) -> int:
+        """Drop entries covering any changed (purity, source, region, date)."""
+        if not changed:
+            return 0
+        with self._lock:
+            self.generation += 1
+            stale = [
+                key
+                for key, (scope, _) in self._entries.items()
+                if any(_covers(scope, row) for row in changed)
+            ]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _covers(scope, row) -> bool:
+    purity, source, region, start, end = scope
+    row_purity, row_source, row_region, row_date = row
+    return (
+        (purity is None or purity == row_purity)
+        and (source is None or source == row_source)
+        and region == row_region
+        and (start is None or row_date >= start)
+        and (end is None or row_date <= end)
+    )
+
+
+class BadRequest(ValueError):
+    """A query parameter is missing or malformed."""
+
+
+def _iso_date(params, name, required=False):
+    value = params.get(name)
+    if value is None:
+        if required:
+            raise BadRequest(f"missing '{name}'")
+        return None
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise BadRequest(f"'{name}' must be a YYYY-MM-DD date") from None
+
+
+def _required(params, name):
+    if not params.get(name):
+        raise BadRequest(f"missing '{name}'")
+    return params[name]
+
+
+class PriceService:
+    """Answers API requests from the index through the response cache."""
+
+    def __init__(self, index: PriceIndex, cache: ResponseCache | None = None):
+        self.index = index
+        self.cache = cache or ResponseCache()
+        self.synced_at: float | None = None
+
+    def rows_changed(self, rows) -> None:
+        """Mirror listener: apply written rows and invalidate what they touch."""
+        self.cache.invalidate(self.index.apply(rows))
+
+    def handle(self, path: str, params: dict) -> tuple[int, bytes]:
+        """Return (status, JSON body) for a GET request."""
+        if path == "/health":
+            return 200, _encode(
+                {
+                    "rows": len(self.index),
+                    "cached_responses": len(self.cache),
+                    "cache_hits": self.cache.hits,
+                    "cache_misses": self.cache.misses,
+                    "synced_at": self.synced_at,
+                }
+            )
+
+        cache_key = path + "?" + urlencode(sorted(params.items()))
+        body = self.cache.get(cache_key)
+        if body is not None:
+            return 200, body
+        # Read before the index: an invalidation from here on may have
+        # landed after the query read the rows
+        generation = self.cache.generation
+        try:
+            scope, payload = self._query(path, params)
+        except BadRequest as e:
+            return 400, _encode({"error": str(e)})
+        if scope is None:
+            return 404, _encode({"error": f"unknown path {path}"})
+        body = _encode(payload)
+        self.cache.put(cache_key, scope, body, generation)
+        return 200, body
+
+    def _query(self, path, params):
+        region = params.get("region", "")
+        purity = params.get("purity")
+        source = params.get("source")
+        if path == "/prices/latest":
+            scope = (purity, source, region, None, None)
+            return scope, self.index.latest(purity, source, region)
+        if path == "/prices/range":
+            start = _iso_date(params, "start", required=True)
+            end = _iso_date(params, "end")
+            scope = (purity, source, region, start, end)
+            return scope, self.index.range(start, end, purity, source, region)
+        if path == "/prices/series":
+            source = _required(params, "source")
+            purity = _required(params, "purity")
+            start = _iso_date(params, "start")
+            end = _iso_date(params, "end")
+            scope = (purity, source, region, start, end)
+            return scope, self.index.series(source, purity, start, end, region)
+        return None, None
+
+
+def _encode(payload) -> bytes:
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+def load_index() -> PriceIndex:
+    """Build the index from the local mirror."""
+    from scraper.db import read_mirror
+
+    index = PriceIndex()
+    index.load(
+        read_mirror(
+            "select purity, source, region, date, price_per_gm from gold_prices "
+            "order by purity, source, region, date"
+        )
+    )
+    return index
+
+
+def _sync_loop(service: PriceService, stop: threading.Event, interval: float):
+    from scraper.db import sync_mirror
+
+    while not stop.is_set():
+        try:
+            applied = sync_mirror()
+            service.synced_at = time.time()
+            if applied:
+                print(f"Mirror sync applied {applied} row(s).")
+        except Exception as e:
+            # Keep serving the last good index; the next sync retries
+            print(f"Mirror sync failed: {str(e)}")
+        stop.wait(interval)
+
+
+def make_server(service: PriceService, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """A threading HTTP server answering GET requests from ``service``."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlsplit(self.path)
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            status, body = service.handle(url.path, params)
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, refresh=DEFAULT_REFRESH_SECONDS):
+    """Serve the API until interrupted; ``refresh`` <= 0 disables syncing."""
+    from scraper.db import add_mirror_listener
+
+    service = PriceService(load_index())
+    add_mirror_listener(service.rows_changed)
+    stop = threading.Event()
+    if refresh > 0:
+        threading.Thread(
+            target=_sync_loop, args=(service, stop, refresh), daemon=True
+        ).start()
+    server = make_server(service, host, port)
+    print(f"Serving {len(service.index)} price(s) on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument(
+        "--refresh",
+        type=float,
+        default=DEFAULT_REFRESH_SECONDS,
+        help="seconds between incremental mirror syncs from Supabase",
+    )
+    parser.add_argument(
+        "--no-sync",
+        action="store_true",
+        help="serve the local mirror as is, without Supabase credentials",
+    )
+    args = parser.parse_args()
+    serve(args.host, args.port, 0 if args.no_sync else args.refresh)
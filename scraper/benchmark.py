@@ -0,0 +1,197 @@
+"""Offline microbenchmarks for the source parsers and price reconciliation.
+
+Parsers run against recorded pages in ``scraper/fixtures/``; reconciliation
+runs against synthetic stored rows. Nothing touches the network or Supabase,
+so numbers are comparable between runs on the same machine:
+
+    python -m scraper.benchmark
+    python -m scraper.benchmark --sizes 1000 100000 --json bench.json
+"""
+
+import argparse
+import json
+import random
+import timeit
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+FIXTURE_DIR = Path(__file__).resolve().parent / "fixtures"
+RECONCILE_SIZES = (1_000, 100_000, 1_000_000)
+# Size of the text chunks streamed into the incremental scanners
+STREAM_CHUNK_SIZE = 8192
+
+_IST = timezone(timedelta(hours=5, minutes=30))
+_SOURCES = ("Tanishq", "Malabar Gold & Diamonds", "GRT Jewels", "Google")
+_PURITIES = ("24K", "22K", "18K", "9K")
+
+
+def _read_fixture(name: str) -> str:
+    return (FIXTURE_DIR / name).read_text(encoding="utf-8")
+
+
+def _chunks(text: str, size: int = STREAM_CHUNK_SIZE) -> list[str]:
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+def _measure(func, min_time: float = 0.2, repeat: int = 5) -> float:
+    """Best seconds per call, auto-ranging the loop count like ``timeit``."""
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    if elapsed < min_time:
+        number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def parser_cases() -> dict:
+    """Name -> zero-argument callable for each parser over its fixture.
+
+    Each fixture is parsed once up front so a fixture that no longer parses
+    fails loudly instead of timing the error path.
+    """
+    from scraper.scrape_gold import (
+        GRT_GOLD_RATE_MARKER,
+        MALABAR_ITEMS_MARKER,
+        _JsonArrayItemScanner,
+        _keep_latest,
+        _latest_by_purity,
+        _latest_by_region,
+        _MarkerArrayScanner,
+        _parse_google_date,
+        _parse_google_gold_price,
+        _parse_grt_gold_rates,
+        _TanishqRateScanner,
+    )
+
+    google_text = _read_fixture("google_card.txt")
+    grt_chunks = _chunks(_read_fixture("grt_home.html"))
+    malabar_payload = _read_fixture("malabar_metal_rate.json")
+    malabar_chunks = _chunks(malabar_payload)
+    tanishq_chunks = _chunks(_read_fixture("tanishq_rate.html"))
+
+    def grt_scan():
+        scanner = _MarkerArrayScanner(GRT_GOLD_RATE_MARKER)
+        for chunk in grt_chunks:
+            array_text = scanner.feed(chunk)
+            if array_text is not None:
+                return array_text
+        return None
+
+    def malabar_reduce():
+        items = json.loads(malabar_payload)["data"]["getMetalRate"]["items"]
+        return _latest_by_purity(_latest_by_region(items))
+
+    def malabar_scan():
+        scanner = _JsonArrayItemScanner(MALABAR_ITEMS_MARKER)
+        latest = {}
+        for chunk in malabar_chunks:
+            for item in scanner.feed(chunk):
+                _keep_latest(latest, item)
+            if scanner.done:
+                break
+        return latest
+
+    def tanishq_scan():
+        scanner = _TanishqRateScanner()
+        for chunk in tanishq_chunks:
+            if scanner.feed(chunk):
+                break
+        return scanner.rate_attrs
+
+    grt_array = grt_scan()
+    cases = {
+        "google_gold_price": lambda: _parse_google_gold_price(google_text),
+        "google_date": lambda: _parse_google_date(google_text),
+        "grt_scan": grt_scan,
+        "grt_parse": lambda: _parse_grt_gold_rates(grt_array),
+        "malabar_latest_by_purity": malabar_reduce,
+        "malabar_scan": malabar_scan,
+        "tanishq_scan": tanishq_scan,
+    }
+    for name, func in cases.items():
+        if func() in (None, (None, None), {}):
+            raise RuntimeError(f"Fixture for {name} no longer parses")
+    return cases
+
+
+def synthetic_reconciliation(n_rows: int, seed: int = 0):
+    """Build (results, existing) for roughly ``n_rows`` stored rows.
+
+    Every (source, date) pair carries four purities. One pair in ten has no
+    stored rows (inserts) and one in three has a changed 24K price
+    (updates and a re-derived 9K); the rest are unchanged.
+    """
+    from scraper.price_store import PriceStore
+
+    rng = random.Random(seed)
+    created_dt = "2026-01-01T10:00:00+05:30"
+    created_by = "gold-bot@users.noreply.github.com"
+    start = date(2000, 1, 1)
+    results = []
+    existing = PriceStore()
+    for i in range(max(1, n_rows // len(_PURITIES))):
+        source = _SOURCES[i % len(_SOURCES)]
+        day = (start + timedelta(days=i // len(_SOURCES))).isoformat()
+        price_24k = rng.randint(5_000, 16_000)
+        stored = {
+            "24K": price_24k,
+            "22K": round(price_24k * 22 / 24),
+            "18K": round(price_24k * 18 / 24),
+            "9K": round(price_24k * 9 / 24),
+        }
+        if i % 10:
+            for purity, price in stored.items():
+                existing.add(source, day, purity, "", price, created_dt, created_by)
+        scraped_24k = price_24k + 10 if i % 3 == 0 else price_24k
+        results.append(
+            {
+                "source": source,
+                "success": True,
+                "date": day,
+                "rates": {
+                    "24K": str(scraped_24k),
+                    "22K": str(stored["22K"]),
+                    "18K": str(stored["18K"]),
+                },
+                "error": None,
+            }
+        )
+    return results, existing
+
+
+def run(sizes=RECONCILE_SIZES) -> dict:
+    """Run every benchmark; return seconds per call keyed by benchmark name."""
+    from scraper.scrape_gold import reconcile_prices
+
+    timings = {}
+    for name, func in parser_cases().items():
+        timings[name] = _measure(func)
+        print(f"{name:<32} {timings[name] * 1e6:>12.1f} µs")
+
+    now_tz = datetime(2026, 2, 4, 16, 0, tzinfo=_IST)
+    for n_rows in sizes:
+        results, existing = synthetic_reconciliation(n_rows)
+        name = f"reconcile_{n_rows}"
+        # Large sizes take long enough that a few single calls suffice
+        timings[name] = _measure(
+            lambda: reconcile_prices(results, existing, now_tz),
+            min_time=0,
+            repeat=3,
+        )
+        print(f"{name:<32} {timings[name] * 1e3:>12.2f} ms")
+    return timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=list(RECONCILE_SIZES),
+        help="synthetic stored-row counts for the reconciliation benchmark",
+    )
+    parser.add_argument("--json", type=Path, help="also write timings to this file")
+    args = parser.parse_args()
+    timings = run(args.sizes)
+    if args.json:
+        args.json.write_text(json.dumps(timings, indent=2) + "\n", encoding="utf-8")
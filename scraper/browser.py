@@ -0,0 +1,163 @@
+"""Warm, reusable Chrome session for browser-backed scrapers."""
+
+import atexit
+import os
+import threading
+
+from scraper import metrics
+
+DEFAULT_USER_DATA_DIR = "/tmp/chrome-google-scrape"
+# Well under the browser source timeout, so a hung page load fails the
+# profile instead of outliving the source (Selenium's default is 300s)
+PAGE_LOAD_TIMEOUT_SECONDS = 30
+
+# Requests the scraper never needs: the gold card is plain text, so images,
+# fonts, stylesheets and third-party trackers only cost time and memory.
+BLOCKED_URL_PATTERNS = [
+    "*.png",
+    "*.jpg",
+    "*.jpeg",
+    "*.gif",
+    "*.webp",
+    "*.avif",
+    "*.svg",
+    "*.ico",
+    "*.woff",
+    "*.woff2",
+    "*.ttf",
+    "*.otf",
+    "*.css",
+    "*googletagmanager.com*",
+    "*google-analytics.com*",
+    "*doubleclick.net*",
+    "*googlesyndication.com*",
+    "*googleadservices.com*",
+    "*youtube.com*",
+    "*ytimg.com*",
+]
+
+_HIDE_WEBDRIVER_SCRIPT = (
+    "Object.defineProperty(navigator, 'webdriver', {get: () => undefined});"
+)
+
+
+class BrowserSession:
+    """Keep one warm Chrome driver and retarget it per profile.
+
+    Chrome only has to be restarted when the headless mode changes; the user
+    agent and window size of a running driver are switched over CDP. The
+    driver reuses ``user_data_dir`` so cookies and the HTTP cache survive
+    across runs.
+    """
+
+    def __init__(self, user_data_dir: str = DEFAULT_USER_DATA_DIR):
+        self.user_data_dir = user_data_dir
+        self.lock = threading.Lock()
+        self._driver = None
+        self._headless_arg = None
+
+    def _launch(self, headless_arg: str, window_size: str):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+
+        options = Options()
+        options.page_load_strategy = "eager"
+        options.add_argument(headless_arg)
+        options.add_argument("--disable-gpu")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument(f"--window-size={window_size}")
+        options.add_argument("--lang=en-IN")
+        options.add_argument("--disable-blink-features=AutomationControlled")
+        options.add_argument("--disable-extensions")
+        options.add_argument("--disable-popup-blocking")
+        options.add_argument(f"--user-data-dir={self.user_data_dir}")
+        options.add_experimental_option(
+            "excludeSwitches", ["enable-automation", "enable-logging"]
+        )
+        options.add_experimental_option("useAutomationExtension", False)
+        options.add_experimental_option(
+            "prefs",
+            {
+                "profile.managed_default_content_settings.images": 2,
+                "profile.managed_default_content_settings.fonts": 2,
+            },
+        )
+
+        chrome_bin = os.environ.get("CHROME_BIN")
+        if chrome_bin:
+            options.binary_location = chrome_bin
+
+        driver = webdriver.Chrome(options=options)
+        try:
+            driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT_SECONDS)
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd(
+                "Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS}
+            )
+            driver.execute_cdp_cmd(
+                "Page.addScriptToEvaluateOnNewDocument",
+                {"source": _HIDE_WEBDRIVER_SCRIPT},
+            )
+        except Exception:
+            driver.quit()
+            raise
+        return driver
+
+    def driver(self, user_agent: str, headless_arg: str, window_size: str):
+        """Return the warm driver configured for this profile.
+
+        Callers must hold ``lock`` while using the returned driver.
+        """
+        if self._driver is not None and self._headless_arg != headless_arg:
+            self.reset()
+        if self._driver is None:
+            with metrics.timed("chrome_launch_seconds"):
+                self._driver = self._launch(headless_arg, window_size)
+            self._headless_arg = headless_arg
+        else:
+            width, height = (int(v) for v in window_size.split(","))
+            self._driver.set_window_size(width, height)
+
+        self._driver.execute_cdp_cmd(
+            "Network.setUserAgentOverride",
+            {
+                "userAgent": user_agent,
+                "platform": "Linux x86_64",
+                "acceptLanguage": "en-IN,en;q=0.9",
+            },
+        )
+        return self._driver
+
+    def reset(self) -> None:
+        """Quit the current driver; the next call to driver() relaunches."""
+        driver, self._driver, self._headless_arg = self._driver, None, None
+        if driver is not None:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    close = reset
+
+
+_sessions: dict[int, BrowserSession] = {}
+_session_lock = threading.Lock()
+
+
+def get_browser_session(slot: int = 0) -> BrowserSession:
+    """Return a process-wide browser session, closed at interpreter exit.
+
+    Slot 0 is the usual session; other slots are extra sessions for
+    concurrent use, each with its own user data directory (Chrome locks the
+    directory to one process).
+    """
+    with _session_lock:
+        session = _sessions.get(slot)
+        if session is None:
+            user_data_dir = DEFAULT_USER_DATA_DIR
+            if slot:
+                user_data_dir = f"{DEFAULT_USER_DATA_DIR}-{slot}"
+            session = _sessions[slot] = BrowserSession(user_data_dir)
+            atexit.register(session.close)
+        return session
@@ -0,0 +1,166 @@
+"""Per-source circuit breakers and hedging thresholds, kept between runs.
+
+A source that fails FAILURE_THRESHOLD runs in a row is skipped ("open")
+for a cool-down of COOLDOWN_RUNS of its runs; the run after that tries it
+once ("half-open"). A success closes the circuit, another failure reopens
+it with the cool-down doubled, up to MAX_COOLDOWN_RUNS. The cool-down
+counts skipped runs rather than wall time, so it scales with the caller's
+interval: hours for the six-hourly workflow, minutes for the daemon.
+Recent durations of successful runs give each source a hedging
+threshold: a plain HTTP source still running past it gets a second,
+concurrent attempt (see scraper.engine).
+
+State is a small JSON file in the scraper state directory, so it survives
+between one-shot runs (the workflow caches the directory) and daemon
+restarts.
+"""
+
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+FAILURE_THRESHOLD = 3
+COOLDOWN_RUNS = 1
+MAX_COOLDOWN_RUNS = 16
+
+# Successful durations kept per source for the hedging threshold
+LATENCY_WINDOW = 20
+HEDGE_MIN_SAMPLES = 5
+HEDGE_QUANTILE = 0.9
+HEDGE_MIN_DELAY = 1.0
+
+STATE_FILE_NAME = "circuit_breakers.json"
+
+
+@dataclass
+class BreakerState:
+    failures: int = 0
+    # Times the circuit opened in a row; each doubles the cool-down
+    trips: int = 0
+    # Runs still to skip while the circuit is open
+    skip_runs: int = 0
+    last_error: str | None = None
+    durations: list[float] = field(default_factory=list)
+
+
+class CircuitBreakers:
+    def __init__(self, path: Path):
+        self.path = path
+        self.states: dict[str, BreakerState] = {}
+
+    @classmethod
+    def load(cls, path: Path | None = None) -> "CircuitBreakers":
+        """Read saved breaker state; a missing or unreadable file starts fresh."""
+        if path is None:
+            from scraper.state import state_path
+
+            path = state_path(STATE_FILE_NAME)
+        breakers = cls(path)
+        try:
+            with open(path, encoding="utf-8") as f:
+                saved = json.load(f)
+            for name, state in saved.items():
+                breakers.states[name] = BreakerState(**state)
+        except (OSError, ValueError, TypeError):
+            breakers.states.clear()
+        return breakers
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({name: asdict(s) for name, s in self.states.items()}, f)
+        os.replace(tmp_path, self.path)
+
+    def _state(self, name: str) -> BreakerState:
+        return self.states.setdefault(name, BreakerState())
+
+    def allow(self, name: str) -> bool:
+        """Whether ``name`` may run: closed, or open with its cool-down over."""
+        state = self.states.get(name)
+        return state is None or state.skip_runs <= 0
+
+    def skip(self, name: str) -> int:
+        """Count a run skipped with the circuit open; return the runs left."""
+        state = self._state(name)
+        state.skip_runs = max(state.skip_runs - 1, 0)
+        return state.skip_runs
+
+    def hedge_delay(self, name: str) -> float | None:
+        """Seconds after which to hedge ``name``, or None without enough history."""
+        state = self.states.get(name)
+        if state is None or len(state.durations) < HEDGE_MIN_SAMPLES:
+            return None
+        durations = sorted(state.durations)
+        index = min(len(durations) - 1, int(len(durations) * HEDGE_QUANTILE))
+        return max(HEDGE_MIN_DELAY, durations[index])
+
+    def record(
+        self,
+        name: str,
+        success: bool,
+        duration: float | None = None,
+        error: str | None = None,
+    ) -> None:
+        """Update ``name`` with the outcome of one run."""
+        state = self._state(name)
+        if success:
+            state.failures = state.trips = state.skip_runs = 0
+            state.last_error = None
+            if duration is not None:
+                state.durations = (state.durations + [round(duration, 3)])[
+                    -LATENCY_WINDOW:
+                ]
+            return
+
+        state.failures += 1
+        state.last_error = error
+        # A failed half-open trial reopens at once; otherwise wait for the threshold
+        if state.trips or state.failures >= FAILURE_THRESHOLD:
+            state.skip_runs = min(COOLDOWN_RUNS * 2**state.trips, MAX_COOLDOWN_RUNS)
+            state.trips += 1
+
+    def record_run(self, results, run_metrics) -> None:
+        """Record every result of a run, with durations from its metrics.
+
+        Results of sources skipped with an open circuit are ignored.
+        """
+        for result in results:
+            if result.get("skipped"):
+                continue
+            name = result["source"]
+            source_metrics = run_metrics.sources.get(name) or {}
+            self.record(
+                name,
+                result["success"],
+                duration=source_metrics.get("duration_seconds"),
+                error=result.get("error"),
+            )
+
+
+def skipped_result(name: str, runs_left: int) -> dict:
+    """Failure result for a source skipped because its circuit is open."""
+    return {
+        "source": name,
+        "success": False,
+        "rates": {},
+        "error": f"Circuit open; {runs_left} more run(s) to skip",
+        "skipped": True,
+    }
+
+
+def hedge_delays(specs, breakers: CircuitBreakers) -> dict[str, float]:
+    """Hedging thresholds for the plain HTTP sources among ``specs``.
+
+    Sources with a browser fallback are never hedged: a second attempt
+    could start a second Chrome.
+    """
+    delays = {}
+    for spec in specs:
+        if spec.transport != "http":
+            continue
+        delay = breakers.hedge_delay(spec.name)
+        if delay is not None:
+            delays[spec.name] = delay
+    return delays
@@ -0,0 +1,179 @@
+"""Long-running scraper: each source on its own interval, clients kept warm.
+
+One process keeps the pooled HTTP client, the Chrome session, the response
+cache and the local mirror open between scrapes. Every source polls on the
+Schedule declared in its registry entry (see scraper.sources), faster
+during market hours, and a source that fails is retried on an exponential
+backoff instead of its normal interval; a source whose circuit breaker is
+open (see scraper.circuit) skips its due runs until the breaker's
+cool-down is spent. Due sources are scraped together, then written
+through the same reconciliation path as a one-shot run:
+
+    python -m scraper.daemon [--sources malabar,grt]
+"""
+
+import asyncio
+import random
+import signal
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta, timezone
+from time import monotonic
+
+from scraper import metrics
+from scraper.sources import Schedule
+
+_IST = timezone(timedelta(hours=5, minutes=30))
+
+# Jewellers revise rates during business hours, Monday to Saturday (IST)
+MARKET_OPEN = time(9, 0)
+MARKET_CLOSE = time(21, 0)
+MARKET_DAYS = range(0, 6)
+
+FAILURE_BACKOFF_SECONDS = 120
+MAX_FAILURE_BACKOFF_SECONDS = 3 * 60 * 60
+# Spread due times so sources drift apart instead of firing in lockstep
+INTERVAL_JITTER = 0.1
+# Longest idle sleep, so a changed clock or market open is noticed promptly
+MAX_IDLE_SECONDS = 300
+
+
+@dataclass
+class SourceState:
+    next_due: float = 0.0
+    failures: int = 0
+
+
+def in_market_hours(now: datetime) -> bool:
+    now = now.astimezone(_IST)
+    return now.weekday() in MARKET_DAYS and MARKET_OPEN <= now.time() < MARKET_CLOSE
+
+
+def next_delay(schedule: Schedule, failures: int, now: datetime) -> float:
+    """Seconds until a source is due again after a run.
+
+    After a failure the retry delay starts at FAILURE_BACKOFF_SECONDS and
+    doubles per consecutive failure, but never waits longer than the normal
+    interval would have (nor MAX_FAILURE_BACKOFF_SECONDS).
+    """
+    interval = (
+        schedule.market_interval
+        if in_market_hours(now)
+        else schedule.off_hours_interval
+    )
+    if failures:
+        interval = min(
+            FAILURE_BACKOFF_SECONDS * 2 ** (failures - 1),
+            interval,
+            MAX_FAILURE_BACKOFF_SECONDS,
+        )
+    return interval * random.uniform(1 - INTERVAL_JITTER, 1 + INTERVAL_JITTER)
+
+
+async def run_daemon(stop: asyncio.Event, specs) -> None:
+    """Scrape due sources (SourceSpecs) until ``stop`` is set."""
+    from scraper.circuit import CircuitBreakers, hedge_delays
+    from scraper.engine import build_http_client, run_sources_async
+    from scraper.http_cache import get_response_cache
+    from scraper.scrape_gold import store_results
+
+    scrapers = [spec.as_scraper() for spec in specs]
+    schedules = {spec.name: spec.schedule for spec in specs}
+    states = {name: SourceState() for name, _, _ in scrapers}
+    breakers = CircuitBreakers.load()
+    # Offline replays say nothing about the live sites' health
+    record_breakers = not get_response_cache().replay
+
+    async with build_http_client() as client:
+        while not stop.is_set():
+            now = monotonic()
+            due = []
+            skipped = False
+            for entry in scrapers:
+                name = entry[0]
+                if states[name].next_due > now:
+                    continue
+                if breakers.allow(name):
+                    due.append(entry)
+                else:
+                    # A skipped run spends the cool-down; due again as usual
+                    runs_left = breakers.skip(name)
+                    skipped = True
+                    states[name].next_due = now + next_delay(
+                        schedules[name], 0, datetime.now(_IST)
+                    )
+                    print(f"Skipping {name}: circuit open, {runs_left} more run(s)")
+            if skipped and not due and record_breakers:
+                try:
+                    breakers.save()
+                except OSError as e:
+                    print(f"Could not save circuit breaker state: {str(e)}")
+            if due:
+                names = ", ".join(name for name, _, _ in due)
+                print(f"[{datetime.now(_IST):%Y-%m-%d %H:%M:%S}] Scraping {names}")
+                run_metrics = metrics.start_run()
+                try:
+                    with run_metrics.phase("scrape"):
+                        results = await run_sources_async(
+                            due,
+                            client=client,
+                            hedge_delays=hedge_delays(specs, breakers),
+                        )
+                    if record_breakers:
+                        breakers.record_run(results, run_metrics)
+                        try:
+                            breakers.save()
+                        except OSError as e:
+                            print(f"Could not save circuit breaker state: {str(e)}")
+                    # Supabase and the mirror are synchronous; keep the loop free
+                    await asyncio.to_thread(store_results, results, run_metrics)
+                except Exception as e:
+                    print(f"Scrape cycle failed: {str(e)}")
+                    results = [{"success": False} for _ in due]
+                finally:
+                    run_metrics.finish()
+                    try:
+                        run_metrics.write()
+                    except OSError as e:
+                        print(f"Could not write run metrics: {str(e)}")
+
+                finished = monotonic()
+                wall_now = datetime.now(_IST)
+                for (name, _, _), result in zip(due, results):
+                    state = states[name]
+                    state.failures = 0 if result["success"] else state.failures + 1
+                    state.next_due = finished + next_delay(
+                        schedules[name], state.failures, wall_now
+                    )
+
+            wait = min(state.next_due for state in states.values()) - monotonic()
+            wait = min(max(wait, 0), MAX_IDLE_SECONDS)
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+
+async def _main(specs) -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await run_daemon(stop, specs)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from scraper.sources import add_source_argument, print_sources, select_sources
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_source_argument(parser)
+    args = parser.parse_args()
+    if args.list_sources:
+        print_sources()
+    else:
+        try:
+            specs = select_sources(args.sources)
+        except ValueError as e:
+            parser.error(str(e))
+        asyncio.run(_main(specs))
@@ -1,14 +1,65 @@
+import json
 import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
+import httpx
 from dotenv import load_dotenv
+from postgrest.exceptions import APIError
 from supabase import Client, create_client
 
+from scraper import metrics
+from scraper.price_store import PriceStore
+
 TABLE_NAME = "gold_prices"
-CONFLICT_COLUMNS = "source,date,purity"
+ROLLUP_REFRESH_FUNCTION = "refresh_gold_price_rollups"
+CONFLICT_COLUMNS = "source,date,purity,region"
+SELECT_COLUMNS = (
+    "source,date,purity,region,price_per_gm,"
+    "created_dt,created_by,modified_dt,modified_by"
+)
+TICK_TABLE_NAME = "gold_price_ticks"
+TICK_CONFLICT_COLUMNS = "source,region,purity,observed_at"
+TICK_COMPACT_FUNCTION = "compact_gold_price_ticks"
+
+# PostgREST rejects oversized bodies; keep each upsert request well below it.
+UPSERT_MAX_ROWS = 500
+UPSERT_MAX_BYTES = 512 * 1024
+UPSERT_CONCURRENCY = 4
+UPSERT_ATTEMPTS = 4
+UPSERT_BACKOFF_SECONDS = 0.5
+
+MIRROR_FILE_NAME = "gold_prices.sqlite3"
+MIRROR_PAGE_SIZE = 1000
+# Sync order; pages continue after the last key seen, so rows whose
+# updated_at moves mid-sync reappear later instead of shifting a page
+MIRROR_SYNC_KEY = ("updated_at", "source", "date", "purity", "region")
+# Incremental syncs re-read this far behind the watermark: updated_at is
+# the writing transaction's start, so a slow transaction can commit rows
+# stamped before ones already synced.
+MIRROR_WATERMARK_OVERLAP = timedelta(minutes=5)
+
+# SQLSTATE classes worth retrying: connection, transaction rollback
+# (serialization/deadlock), insufficient resources, operator intervention
+# (e.g. statement timeout).
+_TRANSIENT_SQLSTATE_CLASSES = ("08", "40", "53", "57")
+# PostgREST's own codes for a database it could not reach in time
+_TRANSIENT_POSTGREST_CODES = ("PGRST000", "PGRST001", "PGRST002", "PGRST003")
 
 _PROJECT_ROOT = Path(__file__).resolve().parent.parent
 
+_client: Client | None = None
+# Called with the rows of every mirror write (see add_mirror_listener)
+_mirror_listeners: list[Callable[[list[dict]], None]] = []
+_client_lock = threading.Lock()
+
 
 def _load_env() -> None:
     """Load .env from repo root or scripts/backfill-prices/ (first found wins)."""
@@ -22,20 +73,481 @@ def _load_env() -> None:
 
 
 def get_client() -> Client:
-    _load_env()
-    url = os.environ.get("SUPABASE_URL")
-    key = os.environ.get("SUPABASE_SECRET_KEY") or os.environ.get(
-        "SUPABASE_SERVICE_ROLE_KEY"
-    )
-    if not url or not key:
-        raise RuntimeError(
-            "SUPABASE_URL and SUPABASE_SECRET_KEY must be set in the environment"
-        )
-    return create_client(url, key)
+    """Return the process-wide Supabase client, creating it on first use.
+
+    The client (and its pooled HTTP connections) is shared by every read and
+    write in the process; it is safe to use from multiple threads.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _load_env()
+            url = os.environ.get("SUPABASE_URL")
+            key = os.environ.get("SUPABASE_SECRET_KEY") or os.environ.get(
+                "SUPABASE_SERVICE_ROLE_KEY"
+            )
+            if not url or not key:
+                raise RuntimeError(
+                    "SUPABASE_URL and SUPABASE_SECRET_KEY must be set in the environment"
+                )
+            _client = create_client(url, key)
+        return _client
+
+
+def iter_chunks(
+    entries: list[dict],
+    max_rows: int = UPSERT_MAX_ROWS,
+    max_bytes: int = UPSERT_MAX_BYTES,
+) -> Iterator[list[dict]]:
+    """Split rows into chunks bounded by row count and JSON payload size."""
+    chunk: list[dict] = []
+    chunk_bytes = 2
+    for entry in entries:
+        entry_bytes = len(json.dumps(entry, default=str)) + 1
+        if chunk and (len(chunk) >= max_rows or chunk_bytes + entry_bytes > max_bytes):
+            yield chunk
+            chunk, chunk_bytes = [], 2
+        chunk.append(entry)
+        chunk_bytes += entry_bytes
+    if chunk:
+        yield chunk
+
+
+def _is_transient_status(status: int) -> bool:
+    return status in (408, 429) or status >= 500
+
+
+def _is_transient(error: Exception) -> bool:
+    if isinstance(error, APIError):
+        code = str(error.code or "")
+        # Non-JSON bodies (e.g. a gateway's 5xx page) carry the HTTP status
+        if code.isdigit() and len(code) == 3:
+            return _is_transient_status(int(code))
+        if code.startswith("PGRST"):
+            return code in _TRANSIENT_POSTGREST_CODES
+        return len(code) == 5 and code[:2] in _TRANSIENT_SQLSTATE_CLASSES
+    if isinstance(error, httpx.HTTPStatusError):
+        return _is_transient_status(error.response.status_code)
+    return isinstance(error, httpx.TransportError)
+
+
+def upsert_chunk(
+    chunk: list[dict],
+    table: str = TABLE_NAME,
+    on_conflict: str = CONFLICT_COLUMNS,
+    ignore_duplicates: bool = False,
+) -> None:
+    """Upsert one chunk, retrying transient failures with backoff.
+
+    With ``ignore_duplicates`` rows whose key already exists are left as
+    they are (insert ... on conflict do nothing).
+    """
+    client = get_client()
+    for attempt in range(UPSERT_ATTEMPTS):
+        try:
+            client.table(table).upsert(
+                chunk,
+                on_conflict=on_conflict,
+                ignore_duplicates=ignore_duplicates,
+            ).execute()
+            return
+        except Exception as e:
+            if attempt == UPSERT_ATTEMPTS - 1 or not _is_transient(e):
+                raise
+            metrics.current_run().increment("upsert_retries")
+            delay = UPSERT_BACKOFF_SECONDS * 2**attempt
+            time.sleep(delay + random.uniform(0, delay))
 
 
-def upsert_gold_prices(entries: list[dict]) -> None:
+def upsert_gold_prices(
+    entries: list[dict], max_workers: int = UPSERT_CONCURRENCY
+) -> None:
+    """Upsert rows in size-limited chunks, a few requests at a time.
+
+    Each chunk is retried with exponential backoff on transient errors; the
+    first permanent failure is raised once in-flight chunks finish. Written
+    rows are also applied to the local mirror.
+    """
     if not entries:
         return
-    client = get_client()
-    client.table(TABLE_NAME).upsert(entries, on_conflict=CONFLICT_COLUMNS).execute()
+    chunks = list(iter_chunks(entries))
+    if len(chunks) == 1:
+        upsert_chunk(chunks[0])
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+            for _ in executor.map(upsert_chunk, chunks):
+                pass
+    # Write through so the mirror reflects our own writes without a re-sync
+    mirror_upsert(entries)
+
+
+def refresh_rollups(dates: Iterable[str]) -> int:
+    """Recompute the day and month rollup buckets covering ``dates``.
+
+    Runs server-side (see migrations/002_gold_price_rollups.sql); returns the
+    number of rollup rows written.
+    """
+    dates = sorted(set(dates))
+    if not dates:
+        return 0
+    response = get_client().rpc(ROLLUP_REFRESH_FUNCTION, {"p_dates": dates}).execute()
+    return response.data or 0
+
+
+def _parse_ts(value: str) -> datetime:
+    """Parse a PostgREST timestamptz (any fraction length, Z or offset)."""
+    value = value.replace("Z", "+00:00")
+    match = re.match(r"^(.*?T\d{2}:\d{2}:\d{2})(?:\.(\d+))?(.*)$", value)
+    if match:
+        base, fraction, offset = match.groups()
+        fraction = (fraction or "0")[:6].ljust(6, "0")
+        value = f"{base}.{fraction}{offset}"
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def mirror_connection(path: Path | None = None) -> sqlite3.Connection:
+    """Open the local SQLite mirror of gold_prices, creating it if needed.
+
+    The mirror lives in the scraper state directory (``SVARNA_MIRROR_PATH``
+    overrides it) and can be queried directly for offline analysis.
+    """
+    if path is None:
+        override = os.environ.get("SVARNA_MIRROR_PATH")
+        if override:
+            path = Path(override)
+        else:
+            from scraper.state import state_path
+
+            path = state_path(MIRROR_FILE_NAME)
+    conn = sqlite3.connect(str(path), timeout=30)
+    conn.row_factory = sqlite3.Row
+    columns = [row["name"] for row in conn.execute(f"pragma table_info({TABLE_NAME})")]
+    if columns and "region" not in columns:
+        # Mirror from before the region column: rebuild it with a full sync
+        with conn:
+            conn.execute(f"drop table {TABLE_NAME}")
+            conn.execute("drop table if exists sync_state")
+    conn.executescript(
+        f"""
+        create table if not exists {TABLE_NAME} (
+          source text not null,
+          date text not null,
+          purity text not null,
+          region text not null default '',
+          price_per_gm integer not null,
+          created_dt text not null,
+          created_by text not null,
+          modified_dt text,
+          modified_by text,
+          primary key (source, date, purity, region)
+        );
+        create index if not exists {TABLE_NAME}_date_idx on {TABLE_NAME} (date);
+        create table if not exists sync_state (
+          name text primary key,
+          value text not null
+        );
+        create table if not exists tick_watermarks (
+          source text not null,
+          region text not null,
+          purity text not null,
+          observed_at text not null,
+          primary key (source, region, purity)
+        );
+        """
+    )
+    return conn
+
+
+def _get_sync_state(conn: sqlite3.Connection, name: str) -> str | None:
+    row = conn.execute(
+        "select value from sync_state where name = ?", (name,)
+    ).fetchone()
+    return row["value"] if row else None
+
+
+def _set_sync_state(conn: sqlite3.Connection, name: str, value: str) -> None:
+    conn.execute(
+        "insert into sync_state (name, value) values (?, ?) "
+        "on conflict (name) do update set value = excluded.value",
+        (name, value),
+    )
+
+
+def add_mirror_listener(callback: Callable[[list[dict]], None]) -> None:
+    """Call ``callback`` with the rows of each mirror write in this process.
+
+    Covers our own upserts and rows pulled in by sync_mirror, so in-memory
+    views of the table can be kept current without re-reading it.
+    """
+    _mirror_listeners.append(callback)
+
+
+def mirror_upsert(rows: Iterable[dict], conn: sqlite3.Connection | None = None) -> int:
+    """Write rows into the mirror (insert or replace by primary key)."""
+    if _mirror_listeners:
+        rows = list(rows)
+    own_conn = conn is None
+    conn = conn or mirror_connection()
+    try:
+        with conn:
+            cursor = conn.executemany(
+                f"insert or replace into {TABLE_NAME} ({SELECT_COLUMNS}) "
+                "values (:source, :date, :purity, :region, :price_per_gm, "
+                ":created_dt, :created_by, :modified_dt, :modified_by)",
+                (
+                    {
+                        **{
+                            column: row.get(column)
+                            for column in SELECT_COLUMNS.split(",")
+                        },
+                        "region": row.get("region") or "",
+                    }
+                    for row in rows
+                ),
+            )
+        for callback in _mirror_listeners:
+            callback(rows)
+        return cursor.rowcount
+    finally:
+        if own_conn:
+            conn.close()
+
+
+def _quote_filter_value(value) -> str:
+    escaped = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+def _after_key_filter(last) -> str:
+    """PostgREST or-filter for rows sorting after ``last`` in MIRROR_SYNC_KEY."""
+    clauses = []
+    for i, column in enumerate(MIRROR_SYNC_KEY):
+        terms = [
+            f"{prev}.eq.{_quote_filter_value(value)}"
+            for prev, value in zip(MIRROR_SYNC_KEY[:i], last)
+        ]
+        terms.append(f"{column}.gt.{_quote_filter_value(last[i])}")
+        clauses.append(terms[0] if len(terms) == 1 else f"and({','.join(terms)})")
+    return ",".join(clauses)
+
+
+def sync_mirror(full: bool = False, client: Client | None = None) -> int:
+    """Pull rows written since the last sync into the mirror.
+
+    The watermark is the newest server-side updated_at seen from Supabase
+    (see migration 005), so back-dated imports and client clock skew do not
+    hide rows. Only the first sync, or one asked for with ``full``, reads
+    the whole table; a full resync also removes mirror rows that no longer
+    exist upstream. Returns the number of rows applied.
+    """
+    conn = mirror_connection()
+    try:
+        now = datetime.now(timezone.utc)
+        watermark = None if full else _get_sync_state(conn, "updated_at_watermark")
+        full = watermark is None
+
+        client = client or get_client()
+        newest = _parse_ts(watermark) if watermark else None
+        since = (newest - MIRROR_WATERMARK_OVERLAP).isoformat() if newest else None
+        applied = 0
+        last = None
+        if full:
+            # Keys seen upstream; mirror rows outside them were deleted there
+            conn.execute(
+                "create temp table if not exists seen_keys "
+                "(source text, date text, purity text, region text, "
+                "primary key (source, date, purity, region))"
+            )
+            conn.execute("delete from seen_keys")
+
+        while True:
+            query = client.table(TABLE_NAME).select(f"{SELECT_COLUMNS},updated_at")
+            if since:
+                query = query.gte("updated_at", since)
+            if last:
+                query = query.or_(_after_key_filter(last))
+            for column in MIRROR_SYNC_KEY:
+                query = query.order(column)
+            response = query.limit(MIRROR_PAGE_SIZE).execute()
+            rows = response.data or []
+            mirror_upsert(rows, conn)
+            applied += len(rows)
+            if full:
+                with conn:
+                    conn.executemany(
+                        "insert or ignore into seen_keys values (?, ?, ?, ?)",
+                        (
+                            (r["source"], r["date"], r["purity"], r.get("region") or "")
+                            for r in rows
+                        ),
+                    )
+            for row in rows:
+                if row.get("updated_at"):
+                    stamp = _parse_ts(row["updated_at"])
+                    if newest is None or stamp > newest:
+                        newest = stamp
+            if len(rows) < MIRROR_PAGE_SIZE:
+                break
+            last = [rows[-1].get(column) or "" for column in MIRROR_SYNC_KEY]
+
+        with conn:
+            if full:
+                deleted = conn.execute(
+                    f"delete from {TABLE_NAME} where not exists ("
+                    "select 1 from seen_keys k where k.source = "
+                    f"{TABLE_NAME}.source and k.date = {TABLE_NAME}.date and "
+                    f"k.purity = {TABLE_NAME}.purity and k.region = "
+                    f"{TABLE_NAME}.region)"
+                ).rowcount
+                if deleted:
+                    print(f"Removed {deleted} mirror row(s) deleted upstream.")
+            if newest is not None:
+                _set_sync_state(conn, "updated_at_watermark", newest.isoformat())
+            if full:
+                _set_sync_state(conn, "last_full_sync", now.isoformat())
+        return applied
+    finally:
+        conn.close()
+
+
+def read_mirror(sql: str, params: Iterable = ()) -> list[dict]:
+    """Run a read-only query against the mirror and return dict rows."""
+    conn = mirror_connection()
+    try:
+        return [dict(row) for row in conn.execute(sql, tuple(params))]
+    finally:
+        conn.close()
+
+
+def fetch_gold_prices_for(
+    source_dates: Iterable[tuple[str, str]], sync: bool = True
+) -> PriceStore:
+    """Return the stored prices for the given (source, date) pairs.
+
+    Reads come from the local mirror after an incremental sync, so the cost
+    depends on the rows changed since the last run and the pairs asked for,
+    not on the size of the table. Rows of every region are loaded into a
+    compact PriceStore keyed by (source, date, purity, region).
+    """
+    existing = PriceStore()
+    pairs = set(source_dates)
+    if not pairs:
+        return existing
+    if sync:
+        # Rows reconciliation pulled from Supabase, as opposed to mirror reads
+        metrics.current_run().increment("reconcile_rows_fetched", sync_mirror())
+    conn = mirror_connection()
+    try:
+        for source, date in pairs:
+            for row in conn.execute(
+                "select source, date, purity, region, price_per_gm, created_dt, "
+                f"created_by from {TABLE_NAME} where source = ? and date = ?",
+                (source, date),
+            ):
+                existing.add(*row)
+        return existing
+    finally:
+        conn.close()
+
+
+def append_ticks(ticks: Iterable[dict], max_workers: int = UPSERT_CONCURRENCY) -> int:
+    """Append intraday ticks not written before; return how many were sent.
+
+    A tick is a dict with source, region, purity, observed_at (ISO
+    timestamp with offset) and price_per_gm. Sources repeat the day's
+    earlier ticks on every fetch, so the mirror keeps the newest
+    observed_at written per series and only later ticks are sent, in
+    size-limited batches that skip keys already stored.
+    """
+    conn = mirror_connection()
+    try:
+        watermarks = {
+            (row["source"], row["region"], row["purity"]): _parse_ts(row["observed_at"])
+            for row in conn.execute(
+                "select source, region, purity, observed_at from tick_watermarks"
+            )
+        }
+        fresh = []
+        newest: dict[tuple[str, str, str], tuple[datetime, str]] = {}
+        for tick in ticks:
+            series = (tick["source"], tick.get("region") or "", tick["purity"])
+            observed_at = _parse_ts(tick["observed_at"])
+            if series in watermarks and observed_at <= watermarks[series]:
+                continue
+            fresh.append({**tick, "region": series[1]})
+            if series not in newest or observed_at > newest[series][0]:
+                newest[series] = (observed_at, tick["observed_at"])
+        if not fresh:
+            return 0
+
+        chunks = list(iter_chunks(fresh))
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+            for _ in executor.map(
+                lambda chunk: upsert_chunk(
+                    chunk,
+                    table=TICK_TABLE_NAME,
+                    on_conflict=TICK_CONFLICT_COLUMNS,
+                    ignore_duplicates=True,
+                ),
+                chunks,
+            ):
+                pass
+
+        # Advance only after every batch landed, so a failed run resends
+        with conn:
+            conn.executemany(
+                "insert into tick_watermarks "
+                "(source, region, purity, observed_at) values (?, ?, ?, ?) "
+                "on conflict (source, region, purity) "
+                "do update set observed_at = excluded.observed_at",
+                [(*series, observed_at) for series, (_, observed_at) in newest.items()],
+            )
+        return len(fresh)
+    finally:
+        conn.close()
+
+
+def compact_ticks() -> int:
+    """Fold aged intraday ticks into hourly and daily OHLC rollups.
+
+    Runs server-side (see migrations/004_gold_price_ticks.sql): ticks past
+    their retention are summarised and deleted, and old hourly rollups are
+    pruned, so the tick tables stay bounded. Returns the number of rollup
+    rows written.
+    """
+    response = get_client().rpc(TICK_COMPACT_FUNCTION, {}).execute()
+    return response.data or 0
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Sync the local gold_prices mirror or refresh price rollups"
+    )
+    parser.add_argument("command", choices=["sync", "rollups"])
+    parser.add_argument(
+        "--full", action="store_true", help="re-download every row from Supabase"
+    )
+    parser.add_argument(
+        "--since",
+        help="rollups: first date (YYYY-MM-DD) to recompute; default all dates",
+    )
+    args = parser.parse_args()
+    if args.command == "sync":
+        applied = sync_mirror(full=args.full)
+        print(f"Mirror sync applied {applied} row(s).")
+    else:
+        sync_mirror()
+        dates = [
+            row["date"]
+            for row in read_mirror(
+                f"select distinct date from {TABLE_NAME} where date >= ?",
+                (args.since or "",),
+            )
+        ]
+        written = refresh_rollups(dates)
+        print(f"Refreshed {written} rollup row(s) for {len(dates)} date(s).")
@@ -0,0 +1,190 @@
+"""Asyncio scraping engine: runs every source over one pooled HTTP client."""
+
+import asyncio
+import contextlib
+import contextvars
+import functools
+import inspect
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+import httpx
+
+from scraper import metrics
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+DEFAULT_SOURCE_TIMEOUT = float(os.environ.get("SCRAPER_SOURCE_TIMEOUT", "20"))
+BROWSER_SOURCE_TIMEOUT = float(os.environ.get("SCRAPER_BROWSER_TIMEOUT", "120"))
+DEFAULT_RUN_DEADLINE = float(os.environ.get("SCRAPER_RUN_DEADLINE", "150"))
+
+
+def build_http_client() -> httpx.AsyncClient:
+    """Build the keep-alive client shared by every HTTP source in a run."""
+    return httpx.AsyncClient(
+        headers={"User-Agent": DEFAULT_USER_AGENT},
+        timeout=httpx.Timeout(DEFAULT_SOURCE_TIMEOUT, connect=10.0),
+        limits=httpx.Limits(
+            max_connections=32, max_keepalive_connections=16, keepalive_expiry=30.0
+        ),
+        follow_redirects=True,
+        event_hooks={"request": [metrics.trace_request]},
+    )
+
+
+def _failed(source_name: str, error: str) -> dict:
+    return {"source": source_name, "success": False, "rates": {}, "error": error}
+
+
+def submit_daemon(func, *args) -> Future:
+    """Run ``func`` on a new daemon thread and return a Future of its result.
+
+    Unlike pool workers, daemon threads are not joined when the interpreter
+    exits, so a wedged blocking call cannot keep the process alive.
+    """
+    future = Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            result = func(*args)
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+    threading.Thread(target=run, name="scraper-blocking", daemon=True).start()
+    return future
+
+
+async def run_blocking(func, *args):
+    """Run a blocking call (e.g. Selenium) from a coroutine source.
+
+    The call gets its own daemon thread (see submit_daemon), so an abandoned
+    browser can hold neither the run past its deadline nor the process at
+    exit. It runs in a copy of the caller's context, so metrics it records
+    are attributed to the calling source.
+    """
+    call = functools.partial(contextvars.copy_context().run, func, *args)
+    return await asyncio.wrap_future(submit_daemon(call))
+
+
+async def _hedged(scraper_func, client, hedge_after):
+    """Run a coroutine source, adding a second attempt if the first is slow.
+
+    If the first attempt has not finished after ``hedge_after`` seconds, a
+    second one starts alongside it. The first successful result wins and
+    the other attempt is cancelled; if both fail, the last failure is
+    returned (or raised).
+    """
+    first = asyncio.create_task(scraper_func(client))
+    pending = {first}
+    try:
+        done, pending = await asyncio.wait(pending, timeout=hedge_after)
+        if done:
+            return first.result()
+        metrics.observe("hedged_requests")
+        pending.add(asyncio.create_task(scraper_func(client)))
+        last = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                last = task
+                if task.exception() is None and task.result()["success"]:
+                    return task.result()
+        return last.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def _run_source(source_name, scraper_func, timeout, client, hedge_after=None):
+    """Run one source within its own timeout.
+
+    Coroutine sources get the shared client; blocking sources (Selenium) run
+    on daemon threads so they never stall the event loop. With
+    ``hedge_after``, a coroutine source still running after that many
+    seconds gets a second attempt (see _hedged).
+    """
+    source_metrics = metrics.bind_source(source_name)
+    start = time.perf_counter()
+    if inspect.iscoroutinefunction(scraper_func):
+        if hedge_after is not None and hedge_after < timeout:
+            call = _hedged(scraper_func, client, hedge_after)
+        else:
+            call = scraper_func(client)
+    else:
+        call = run_blocking(scraper_func)
+
+    try:
+        result = await asyncio.wait_for(call, timeout=timeout)
+        if result.get("unchanged"):
+            source_metrics["outcome"] = "unchanged"
+        else:
+            source_metrics["outcome"] = "success" if result["success"] else "failed"
+    except asyncio.TimeoutError:
+        source_metrics["outcome"] = "timeout"
+        result = _failed(source_name, f"Timed out after {timeout:.0f}s")
+    except asyncio.CancelledError:
+        source_metrics["outcome"] = "deadline"
+        source_metrics["duration_seconds"] = time.perf_counter() - start
+        raise
+    except Exception as e:
+        source_metrics["outcome"] = "failed"
+        result = _failed(source_name, f"Unexpected error: {str(e)}")
+    source_metrics["duration_seconds"] = time.perf_counter() - start
+    source_metrics["error"] = result["error"]
+    return result
+
+
+async def run_sources_async(
+    scrapers, deadline=DEFAULT_RUN_DEADLINE, client=None, hedge_delays=None
+):
+    """Run (name, func, timeout) scrapers concurrently under a run deadline.
+
+    Sources still running when the deadline passes are cancelled and
+    reported as failures; results keep the order of ``scrapers``. A
+    long-lived ``client`` may be passed in to reuse its connections;
+    otherwise one is built for this run and closed afterwards.
+    ``hedge_delays`` maps source names to the seconds after which a slow
+    attempt is hedged with a second one.
+    """
+    hedge_delays = hedge_delays or {}
+    if not scrapers:
+        return []
+    all_results = []
+    # Blocking sources cannot be interrupted; they are left running on their
+    # daemon threads when cancelled
+    async with contextlib.AsyncExitStack() as stack:
+        if client is None:
+            client = await stack.enter_async_context(build_http_client())
+        tasks = {
+            asyncio.create_task(
+                _run_source(name, func, timeout, client, hedge_delays.get(name))
+            ): name
+            for name, func, timeout in scrapers
+        }
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+        for task, name in tasks.items():
+            if task in done:
+                all_results.append(task.result())
+            else:
+                all_results.append(
+                    _failed(name, f"Run deadline of {deadline:.0f}s exceeded")
+                )
+    return all_results
+
+
+def run_sources(scrapers, deadline=DEFAULT_RUN_DEADLINE, hedge_delays=None):
+    """Synchronous entry point for run_sources_async."""
+    return asyncio.run(
+        run_sources_async(scrapers, deadline=deadline, hedge_delays=hedge_delays)
+    )
@@ -0,0 +1,205 @@
+"""On-disk conditional response cache shared by the HTTP scraper sources.
+
+Entries are keyed by URL and query string and hold the ETag/Last-Modified
+validators, the payload the source extracted, a hash of that payload and
+the result parsed from it. A source asks the cache to fetch; if the server
+answers 304 or the payload hashes the same as on the same day's previous
+run, the cached result comes back marked ``unchanged`` and parsing and
+reconciliation are skipped.
+
+With ``SCRAPER_HTTP_REPLAY=1`` the cache is a replay store: payloads are
+served from disk without touching the network, so parsers run offline.
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+
+from scraper import metrics
+
+
+class CacheMiss(Exception):
+    """Raised in replay mode when no response was recorded for a URL."""
+
+
+@dataclass
+class Fetched:
+    key: str
+    url: str
+    payload: str | list | dict | None
+    content_hash: str | None
+    etag: str | None
+    last_modified: str | None
+    unchanged: bool = False
+    result: dict | None = None
+
+
+def _today_ist() -> str:
+    return datetime.now(timezone(timedelta(hours=5, minutes=30))).date().isoformat()
+
+
+def _hash_payload(payload) -> str:
+    if not isinstance(payload, str):
+        payload = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+async def _read_text(response: httpx.Response) -> str:
+    await response.aread()
+    return response.text
+
+
+class ResponseCache:
+    def __init__(self, directory: Path, replay: bool = False):
+        self.directory = directory
+        self.replay = replay
+        self._staged: dict[str, dict] = {}
+
+    @staticmethod
+    def key_for(url: str, params: dict | None = None) -> str:
+        """Stable key for a URL plus query parameters (order-insensitive)."""
+        request_url = httpx.URL(url)
+        if params:
+            request_url = request_url.copy_merge_params(sorted(params.items()))
+        return hashlib.sha256(str(request_url).encode("utf-8")).hexdigest()[:32]
+
+    def _entry_path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def _load(self, key: str) -> dict | None:
+        path = self._entry_path(key)
+        if not path.is_file():
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    async def fetch(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        *,
+        params: dict | None = None,
+        headers: dict | None = None,
+        extract=None,
+    ) -> Fetched:
+        """GET ``url`` with revalidation and return the extracted payload.
+
+        ``extract`` is an async callable turning a streamed 2xx response into
+        the payload: a string, or already decoded JSON data, which is stored
+        and replayed as is (None when the payload is missing). By default the
+        whole body is read. Non-2xx responses other than 304 raise
+        ``httpx.HTTPStatusError``.
+        """
+        key = self.key_for(url, params)
+        entry = self._load(key)
+
+        if self.replay:
+            if entry is None:
+                raise CacheMiss(f"No recorded response for {url}")
+            return Fetched(
+                key=key,
+                url=url,
+                payload=entry.get("payload"),
+                content_hash=entry.get("content_hash"),
+                etag=entry.get("etag"),
+                last_modified=entry.get("last_modified"),
+            )
+
+        request_headers = dict(headers or {})
+        if entry is not None:
+            if entry.get("etag"):
+                request_headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                request_headers["If-Modified-Since"] = entry["last_modified"]
+
+        async with client.stream(
+            "GET", url, params=params, headers=request_headers
+        ) as response:
+            if response.status_code == 304 and entry is not None:
+                payload = entry.get("payload")
+                etag = response.headers.get("ETag", entry.get("etag"))
+                last_modified = response.headers.get(
+                    "Last-Modified", entry.get("last_modified")
+                )
+            else:
+                response.raise_for_status()
+                payload = await (extract or _read_text)(response)
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+            metrics.observe("bytes_downloaded", response.num_bytes_downloaded)
+
+        content_hash = _hash_payload(payload) if payload is not None else None
+        fetched = Fetched(
+            key=key,
+            url=url,
+            payload=payload,
+            content_hash=content_hash,
+            etag=etag,
+            last_modified=last_modified,
+        )
+        # Results without a source-provided date are stamped with the scrape
+        # day, so an unchanged payload only short-circuits within that day.
+        if (
+            entry is not None
+            and content_hash is not None
+            and entry.get("content_hash") == content_hash
+            and entry.get("scraped_on") == _today_ist()
+            and entry.get("result")
+        ):
+            fetched.unchanged = True
+            fetched.result = {**entry["result"], "unchanged": True}
+        return fetched
+
+    def stage(self, fetched: Fetched, result: dict) -> None:
+        """Remember a freshly parsed result; written to disk by commit()."""
+        if self.replay or fetched.payload is None:
+            return
+        self._staged[fetched.key] = {
+            "url": fetched.url,
+            "etag": fetched.etag,
+            "last_modified": fetched.last_modified,
+            "content_hash": fetched.content_hash,
+            "payload": fetched.payload,
+            "scraped_on": _today_ist(),
+            "result": {k: v for k, v in result.items() if k != "unchanged"},
+        }
+
+    def commit(self) -> None:
+        """Persist staged entries.
+
+        Called once the run's results have been reconciled and written, so a
+        failed upsert never leaves a result that would later be skipped as
+        unchanged.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for key, entry in self._staged.items():
+            path = self._entry_path(key)
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        self._staged.clear()
+
+
+_cache: ResponseCache | None = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Return the process-wide response cache under the scraper state dir."""
+    global _cache
+    if _cache is None:
+        from scraper.state import state_path
+
+        _cache = ResponseCache(
+            state_path("http_cache"),
+            replay=os.environ.get("SCRAPER_HTTP_REPLAY", "") == "1",
+        )
+    return _cache
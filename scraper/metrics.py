@@ -0,0 +1,272 @@
+"""Per-run scraper metrics, written as JSON and a Prometheus textfile.
+
+Each source records into its own slot while it runs (the engine binds the
+slot to the source's task, and blocking calls inherit it): request count,
+connect/TLS/time-to-first-byte from httpx connection tracing, bytes
+downloaded, parse time, retries, hedged requests, Chrome launch time and
+Google profiles tried. Run-level counters and phase timings cover
+reconciliation reads, upserts, intraday ticks and snapshot publishing.
+
+Files land in ``scraper/.state/metrics/`` (or ``SCRAPER_METRICS_DIR``):
+``last_run.json`` and ``scraper.prom`` for the node_exporter textfile
+collector.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+
+PROMETHEUS_PREFIX = "svarna_scraper"
+
+_current_source: ContextVar[dict | None] = ContextVar(
+    "scraper_source_metrics", default=None
+)
+
+
+def _new_source(name: str) -> dict:
+    return {
+        "source": name,
+        "outcome": None,
+        "error": None,
+        "duration_seconds": 0.0,
+        "requests": 0,
+        "retries": 0,
+        "bytes_downloaded": 0,
+        "connect_seconds": 0.0,
+        "tls_seconds": 0.0,
+        "ttfb_seconds": 0.0,
+        "parse_seconds": 0.0,
+        "chrome_launch_seconds": 0.0,
+        "google_profiles_tried": 0,
+        "hedged_requests": 0,
+    }
+
+
+class RunMetrics:
+    def __init__(self):
+        self.started_at = datetime.now(timezone.utc)
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self.sources: dict[str, dict] = {}
+        self.phases: dict[str, float] = {}
+        self.counters: dict[str, int] = dict.fromkeys(
+            (
+                "reconcile_rows_fetched",
+                "reconcile_rows_read",
+                "rows_upserted",
+                "upsert_retries",
+                "ticks_appended",
+                "outliers_rejected",
+            ),
+            0,
+        )
+        self.duration_seconds = 0.0
+
+    def source(self, name: str) -> dict:
+        with self._lock:
+            if name not in self.sources:
+                self.sources[name] = _new_source(name)
+            return self.sources[name]
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        """Add to a run-level counter (safe from worker threads)."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a run-level phase such as reconciliation or upsert."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def finish(self) -> None:
+        self.duration_seconds = time.perf_counter() - self._start
+
+    def to_dict(self) -> dict:
+        return {
+            "started_at": self.started_at.isoformat(),
+            "duration_seconds": round(self.duration_seconds, 4),
+            "phases": {k: round(v, 4) for k, v in self.phases.items()},
+            "counters": dict(self.counters),
+            "sources": [
+                {
+                    k: round(v, 4) if isinstance(v, float) else v
+                    for k, v in source.items()
+                }
+                for source in self.sources.values()
+            ],
+        }
+
+    def to_prometheus(self) -> str:
+        """Render the run in the Prometheus text exposition format."""
+        lines = []
+
+        def family(name, help_text, samples):
+            metric = f"{PROMETHEUS_PREFIX}_{name}"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            for labels, value in samples:
+                label_text = ",".join(
+                    f'{key}="{_escape_label(val)}"' for key, val in labels.items()
+                )
+                lines.append(
+                    f"{metric}{{{label_text}}} {value}"
+                    if label_text
+                    else f"{metric} {value}"
+                )
+
+        family(
+            "last_run_timestamp_seconds",
+            "Unix time the last run started.",
+            [({}, self.started_at.timestamp())],
+        )
+        family(
+            "run_duration_seconds",
+            "Wall time of the last run.",
+            [({}, self.duration_seconds)],
+        )
+        family(
+            "phase_duration_seconds",
+            "Wall time per run phase.",
+            [({"phase": name}, value) for name, value in self.phases.items()],
+        )
+        for name, value in self.counters.items():
+            family(name, f"Run counter {name}.", [({}, value)])
+        family(
+            "source_success",
+            "1 if the source returned rates (fresh or unchanged).",
+            [
+                ({"source": s["source"]}, int(s["outcome"] in ("success", "unchanged")))
+                for s in self.sources.values()
+            ],
+        )
+        family(
+            "source_outcome",
+            "Outcome of each source in the last run, as a label.",
+            [
+                ({"source": s["source"], "outcome": s["outcome"] or "unknown"}, 1)
+                for s in self.sources.values()
+            ],
+        )
+        numeric_fields = [
+            key
+            for key, value in _new_source("").items()
+            if isinstance(value, (int, float))
+        ]
+        for field in numeric_fields:
+            family(
+                f"source_{field}",
+                f"Per-source {field.replace('_', ' ')} in the last run.",
+                [({"source": s["source"]}, s[field]) for s in self.sources.values()],
+            )
+        return "\n".join(lines) + "\n"
+
+    def write(self, directory: Path | None = None) -> tuple[Path, Path]:
+        """Write last_run.json and scraper.prom atomically; return their paths."""
+        if directory is None:
+            from scraper.state import state_path
+
+            directory = Path(
+                os.environ.get("SCRAPER_METRICS_DIR") or state_path("metrics")
+            )
+        directory.mkdir(parents=True, exist_ok=True)
+        json_path = directory / "last_run.json"
+        prom_path = directory / "scraper.prom"
+        _write_atomic(json_path, json.dumps(self.to_dict(), indent=2) + "\n")
+        _write_atomic(prom_path, self.to_prometheus())
+        return json_path, prom_path
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _write_atomic(path: Path, content: str) -> None:
+    # The textfile collector must never read a half-written file
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_text(content, encoding="utf-8")
+    tmp_path.replace(path)
+
+
+_run = RunMetrics()
+
+
+def start_run() -> RunMetrics:
+    """Begin collecting metrics for a new run and return its collector."""
+    global _run
+    _run = RunMetrics()
+    return _run
+
+
+def current_run() -> RunMetrics:
+    return _run
+
+
+def bind_source(name: str) -> dict:
+    """Attribute metrics recorded in this context to ``name``; return its slot.
+
+    Call from inside the source's own task so the binding stays local to it.
+    """
+    source = _run.source(name)
+    _current_source.set(source)
+    return source
+
+
+def observe(name: str, amount=1) -> None:
+    """Add ``amount`` to a field of the running source's metrics, if any."""
+    source = _current_source.get()
+    if source is not None:
+        source[name] += amount
+
+
+@contextmanager
+def timed(name: str):
+    """Add the wall time of the block to a field of the running source."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start)
+
+
+async def trace_request(request) -> None:
+    """httpx request hook: count the request and trace its connection phases.
+
+    httpcore resolves DNS inside ``connect_tcp``, so connect time includes
+    the lookup. Time to first byte runs from sending the request headers to
+    receiving the response headers.
+    """
+    source = _current_source.get()
+    if source is None:
+        return
+    source["requests"] += 1
+    started: dict[str, float] = {}
+    phase_fields = {
+        "connection.connect_tcp": "connect_seconds",
+        "connection.start_tls": "tls_seconds",
+    }
+
+    async def trace(event_name, info):
+        prefix, _, stage = event_name.rpartition(".")
+        if stage == "started":
+            started[prefix] = time.perf_counter()
+            if prefix.endswith("send_request_headers"):
+                started["request_sent"] = started[prefix]
+        elif stage == "complete" and prefix in started:
+            now = time.perf_counter()
+            if prefix in phase_fields:
+                source[phase_fields[prefix]] += now - started[prefix]
+            elif prefix.endswith("receive_response_headers"):
+                source["ttfb_seconds"] += now - started.get("request_sent", now)
+
+    request.extensions["trace"] = trace
@@ -0,0 +1,153 @@
+"""Compact in-memory store of gold prices keyed by source/date/purity/region.
+
+Reconciliation only needs a key and an integer price per row, plus the
+created_* columns to carry over when a row is updated. Instead of a full
+row dict per key, each (source, purity, region) series is interned to a
+small code, dates become ordinals, and the two are packed into one int that
+indexes array-backed prices and created_* codes. Full row dicts are produced only
+for rows that are about to be written.
+"""
+
+from array import array
+from collections.abc import Iterator
+from datetime import date
+
+
+class _Interner:
+    """Bidirectional value <-> small int code table."""
+
+    def __init__(self):
+        self.codes: dict = {}
+        self.values: list = []
+
+    def code(self, value) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+# Packed key layout: date ordinal above a (source, purity, region) series code
+_SERIES_BITS = 32
+_SERIES_MASK = (1 << _SERIES_BITS) - 1
+
+
+class PriceStore:
+    """Prices keyed by (source, date, purity, region) with cheap diffs.
+
+    Keys are (source, ISO date, purity, region) tuples, region "" being a
+    source's headline price; ``get`` makes the store usable as the ``known``
+    mapping of ``scraper.purity.missing_or_changed`` (with ``regions``).
+    """
+
+    def __init__(self):
+        # Each (source, purity, region) is one series with a small code
+        self._series = _Interner()
+        # created_dt / created_by values, shared by every row of a scrape run
+        self._stamps = _Interner()
+        # ISO date -> ordinal, so each distinct date is parsed once
+        self._ordinals: dict[str, int] = {}
+        self._slots: dict[int, int] = {}
+        self._prices = array("q")
+        self._created_dt = array("l")
+        self._created_by = array("l")
+
+    def _unpack(self, packed: int) -> tuple[str, str, str, str]:
+        source, purity, region = self._series.values[packed & _SERIES_MASK]
+        iso_date = date.fromordinal(packed >> _SERIES_BITS).isoformat()
+        return source, iso_date, purity, region
+
+    def _slot(self, key: tuple[str, str, str, str]) -> int | None:
+        source, iso_date, purity, region = key
+        series = self._series.codes.get((source, purity, region))
+        # Every stored date is in _ordinals, so unknown dates need no parsing
+        ordinal = self._ordinals.get(iso_date)
+        if series is None or ordinal is None:
+            return None
+        return self._slots.get((ordinal << _SERIES_BITS) | series)
+
+    def add(
+        self,
+        source: str,
+        iso_date: str,
+        purity: str,
+        region: str,
+        price: int,
+        created_dt: str | None = None,
+        created_by: str | None = None,
+    ) -> None:
+        """Insert or overwrite one price; created_* are kept for updates."""
+        ordinal = self._ordinals.get(iso_date)
+        if ordinal is None:
+            ordinal = date.fromisoformat(iso_date).toordinal()
+            self._ordinals[iso_date] = ordinal
+        packed = (ordinal << _SERIES_BITS) | self._series.code((source, purity, region))
+        dt_code = -1 if created_dt is None else self._stamps.code(created_dt)
+        by_code = -1 if created_by is None else self._stamps.code(created_by)
+        slot = self._slots.get(packed)
+        if slot is None:
+            self._slots[packed] = len(self._prices)
+            self._prices.append(price)
+            self._created_dt.append(dt_code)
+            self._created_by.append(by_code)
+        else:
+            self._prices[slot] = price
+            self._created_dt[slot] = dt_code
+            self._created_by[slot] = by_code
+
+    def get(self, key: tuple[str, str, str, str], default=None):
+        """Price stored for ``key``, or ``default``."""
+        slot = self._slot(key)
+        return default if slot is None else self._prices[slot]
+
+    def created(self, key: tuple[str, str, str, str]) -> tuple[str | None, str | None]:
+        """The (created_dt, created_by) stored for ``key``."""
+        slot = self._slot(key)
+        if slot is None:
+            raise KeyError(key)
+        stamps = self._stamps.values
+        dt_code, by_code = self._created_dt[slot], self._created_by[slot]
+        return (
+            None if dt_code < 0 else stamps[dt_code],
+            None if by_code < 0 else stamps[by_code],
+        )
+
+    def __contains__(self, key) -> bool:
+        return self._slot(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __iter__(self) -> Iterator[tuple[str, str, str, str]]:
+        return (self._unpack(packed) for packed in self._slots)
+
+    def items(self) -> Iterator[tuple[tuple[str, str, str, str], int]]:
+        """(key, price) pairs in insertion order."""
+        prices = self._prices
+        return ((self._unpack(p), prices[slot]) for p, slot in self._slots.items())
+
+    def diff(self, other: "PriceStore") -> tuple[list[tuple], list[tuple]]:
+        """Compare ``other`` against this store.
+
+        Returns (inserts, updates) as (key, price) pairs
+        from ``other``: keys missing here, and keys present in both whose
+        price differs, in ``other``'s order. Keys are compared in packed
+        form by remapping ``other``'s series codes to ours.
+        """
+        series_map = [self._series.codes.get(v) for v in other._series.values]
+        own_slots, own_prices = self._slots, self._prices
+        inserts, updates = [], []
+        for packed, slot in other._slots.items():
+            price = other._prices[slot]
+            series = series_map[packed & _SERIES_MASK]
+            own_slot = None
+            if series is not None:
+                own_slot = own_slots.get(
+                    ((packed >> _SERIES_BITS) << _SERIES_BITS) | series
+                )
+            if own_slot is None:
+                inserts.append((other._unpack(packed), price))
+            elif own_prices[own_slot] != price:
+                updates.append((other._unpack(packed), price))
+        return inserts, updates
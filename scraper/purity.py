@@ -0,0 +1,66 @@
+"""Derive lower-purity gold prices from 24K prices, a whole batch at a time.
+
+Batches are columnar: parallel sequences of sources, dates and 24K prices.
+Each derived purity is computed as one column over the batch, then compared
+against the prices already known for those keys in the same pass.
+"""
+
+from collections.abc import Container, Mapping, Sequence
+
+# Fineness relative to 24K
+DERIVATION_RATIOS = {"22K": 22 / 24, "18K": 18 / 24, "9K": 9 / 24}
+
+
+def derive_column(prices_24k: Sequence[int], purity: str) -> list[int]:
+    """Derived per-gram prices for one purity across a batch of 24K prices."""
+    ratio = DERIVATION_RATIOS[purity]
+    return [round(price * ratio) for price in prices_24k]
+
+
+def derived_rates(price_24k: int) -> dict[str, int]:
+    """Every derived purity for a single 24K price."""
+    return {
+        purity: derive_column((price_24k,), purity)[0] for purity in DERIVATION_RATIOS
+    }
+
+
+def missing_or_changed(
+    sources: Sequence[str],
+    dates: Sequence[str],
+    prices_24k: Sequence[int],
+    known: Mapping[tuple[str, str, str], int],
+    skip: Container[tuple] = (),
+    refresh: Container[str] = (),
+    regions: Sequence[str] | None = None,
+) -> list[tuple]:
+    """Return (source, date, purity, price) rows that need writing.
+
+    ``known`` maps (source, date, purity) to the price already stored or
+    scraped. A derived row is returned when its key is not known, or when
+    its purity is in ``refresh`` and the known price differs. Keys in
+    ``skip`` (e.g. purities scraped directly) are never derived.
+
+    With ``regions`` (a column parallel to ``sources``), keys are
+    (source, date, purity, region) and rows are
+    (source, date, purity, region, price).
+    """
+    rows = []
+    for purity in DERIVATION_RATIOS:
+        derived = derive_column(prices_24k, purity)
+        if regions is None:
+            for source, date, price in zip(sources, dates, derived):
+                key = (source, date, purity)
+                if key in skip:
+                    continue
+                current = known.get(key)
+                if current is None or (purity in refresh and current != price):
+                    rows.append((source, date, purity, price))
+        else:
+            for source, date, region, price in zip(sources, dates, regions, derived):
+                key = (source, date, purity, region)
+                if key in skip:
+                    continue
+                current = known.get(key)
+                if current is None or (purity in refresh and current != price):
+                    rows.append((source, date, purity, region, price))
+    return rows
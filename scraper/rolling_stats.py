@@ -0,0 +1,346 @@
+"""Rolling price statistics for rejecting bad parses before they are stored.
+
+Each (source, purity, region) series keeps an exponentially weighted mean
+and variance plus its last value, updated in O(1) per stored price; each
+recent day keeps the headline price every source reported. A scraped
+price is an outlier when it is far from its series' mean (in standard
+deviations, with a floor relative to the price) and the other sources'
+prices for the same day do not back it up, or when it disagrees with that
+cross-source consensus and its series has too little history to vouch
+for it. A real market move shows up across sources and passes; a 1g/10g
+mix-up in one source does not. A series whose prices are rejected at a
+consistent level LEVEL_SHIFT_RUNS runs in a row, with no cross-source
+consensus against them (e.g. a regional price), is taken to have moved
+and is re-seeded at that level.
+
+State is a JSON file in the scraper state directory, so checks never
+re-read the price history.
+"""
+
+import json
+import math
+import os
+import statistics
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+# Smoothing of the weighted mean/variance, roughly a 30-day window
+EWMA_ALPHA = 2 / (30 + 1)
+# Stored days a series needs before its own statistics can reject a price
+MIN_HISTORY = 5
+MAX_DEVIATION = 6.0
+# Standard deviation floor as a share of the mean, so a flat history does
+# not turn every ordinary move into an outlier
+MIN_RELATIVE_STD = 0.02
+# Other sources needed for a consensus, and how far from its median a price may be
+CONSENSUS_MIN_SOURCES = 2
+CONSENSUS_TOLERANCE = 0.08
+CONSENSUS_DAYS = 3
+# Consecutive runs rejecting prices within LEVEL_SHIFT_TOLERANCE of each
+# other before the series accepts them as its new level
+LEVEL_SHIFT_RUNS = 3
+LEVEL_SHIFT_TOLERANCE = 0.03
+
+STATE_FILE_NAME = "rolling_stats.json"
+
+
+@dataclass
+class SeriesStats:
+    count: int = 0
+    mean: float = 0.0
+    var: float = 0.0
+    last: int | None = None
+    last_date: str | None = None
+    # Statistics before last_date's price, so a same-day re-scrape replaces it
+    prev_count: int = 0
+    prev_mean: float = 0.0
+    prev_var: float = 0.0
+    # The level of the latest run of rejected prices, and its length
+    rejected_value: int | None = None
+    rejected_runs: int = 0
+
+    def update(self, value: int, iso_date: str) -> None:
+        """Fold in the price for ``iso_date``; older dates are ignored."""
+        if iso_date == self.last_date:
+            self.count, self.mean, self.var = (
+                self.prev_count,
+                self.prev_mean,
+                self.prev_var,
+            )
+        elif self.last_date is not None and iso_date < self.last_date:
+            return
+        else:
+            self.prev_count, self.prev_mean, self.prev_var = (
+                self.count,
+                self.mean,
+                self.var,
+            )
+        if self.count == 0:
+            self.mean, self.var = float(value), 0.0
+        else:
+            # A plain running mean until the window has filled
+            alpha = max(EWMA_ALPHA, 1 / (self.count + 1))
+            diff = value - self.mean
+            increment = alpha * diff
+            self.mean += increment
+            self.var = (1 - alpha) * (self.var + diff * increment)
+        self.count += 1
+        self.last = value
+        self.last_date = iso_date
+
+    def deviation(self, value: int) -> float | None:
+        """Distance of ``value`` from the mean in standard deviations.
+
+        None while the series has fewer than MIN_HISTORY prices.
+        """
+        if self.count < MIN_HISTORY:
+            return None
+        std = max(math.sqrt(self.var), abs(self.mean) * MIN_RELATIVE_STD)
+        return abs(value - self.mean) / std if std else 0.0
+
+
+class RollingStats:
+    def __init__(self, path: Path):
+        self.path = path
+        self.series: dict[tuple[str, str, str], SeriesStats] = {}
+        # date -> purity -> source -> headline price
+        self.days: dict[str, dict[str, dict[str, int]]] = {}
+
+    @classmethod
+    def load(cls, path: Path | None = None) -> "RollingStats":
+        """Read saved statistics; a missing or unreadable file starts fresh."""
+        if path is None:
+            from scraper.state import state_path
+
+            path = state_path(STATE_FILE_NAME)
+        stats = cls(path)
+        try:
+            with open(path, encoding="utf-8") as f:
+                saved = json.load(f)
+            for key, series in saved["series"].items():
+                stats.series[tuple(key.split("\t"))] = SeriesStats(**series)
+            stats.days = saved["days"]
+        except (OSError, ValueError, KeyError, TypeError):
+            stats.series.clear()
+            stats.days = {}
+        return stats
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "series": {
+                        "\t".join(key): asdict(s) for key, s in self.series.items()
+                    },
+                    "days": self.days,
+                },
+                f,
+            )
+        os.replace(tmp_path, self.path)
+
+    def observe(
+        self, source: str, iso_date: str, purity: str, region: str, price: int
+    ) -> None:
+        """Record a stored price."""
+        key = (source, purity, region)
+        series = self.series.setdefault(key, SeriesStats())
+        series.update(price, iso_date)
+        series.rejected_value, series.rejected_runs = None, 0
+        if region:
+            return
+        self.days.setdefault(iso_date, {}).setdefault(purity, {})[source] = price
+        for old_date in sorted(self.days)[:-CONSENSUS_DAYS]:
+            del self.days[old_date]
+
+    def observe_results(self, results, today_iso: str) -> None:
+        """Record the headline and regional prices of stored results."""
+        from scraper.scrape_gold import _rate_sets
+
+        for result in results:
+            for iso_date, region, rates in _rate_sets(result, today_iso):
+                for purity, value in rates.items():
+                    price = _parse_price(value)
+                    if price is not None:
+                        self.observe(result["source"], iso_date, purity, region, price)
+
+    def consensus(
+        self, source: str, iso_date: str, purity: str, others=None
+    ) -> float | None:
+        """Median headline price of the other sources for the day, if enough report.
+
+        ``others`` maps source to price for this run's not yet stored
+        results; they take precedence over stored prices of the same source.
+        """
+        prices = dict(self.days.get(iso_date, {}).get(purity, {}))
+        prices.update(others or {})
+        prices.pop(source, None)
+        if len(prices) < CONSENSUS_MIN_SOURCES:
+            return None
+        return statistics.median(prices.values())
+
+    def check(
+        self,
+        source: str,
+        iso_date: str,
+        purity: str,
+        region: str,
+        price: int,
+        others=None,
+    ) -> str | None:
+        """Return why ``price`` looks like a bad parse, or None if it is plausible.
+
+        A rejection the cross-source consensus does not contradict is
+        remembered on the series; the LEVEL_SHIFT_RUNS-th in a row at a
+        consistent level is accepted instead and re-seeds the series at
+        ``price``. A price the other sources disagree with is always rejected.
+        """
+        key = (source, purity, region)
+        series = self.series.get(key)
+        reason, agrees = self._reason(
+            series, source, iso_date, purity, region, price, others
+        )
+        if reason is None:
+            return None
+        if agrees is False:
+            return reason
+        series = self.series.setdefault(key, SeriesStats())
+        level = series.rejected_value
+        if level is not None and abs(price - level) <= level * LEVEL_SHIFT_TOLERANCE:
+            series.rejected_runs += 1
+        else:
+            series.rejected_value, series.rejected_runs = price, 1
+        if series.rejected_runs < LEVEL_SHIFT_RUNS:
+            return reason
+        # Enough history for the deviation test to apply from the new level on
+        self.series[key] = SeriesStats(count=MIN_HISTORY, mean=float(price))
+        return None
+
+    def _reason(self, series, source, iso_date, purity, region, price, others):
+        """(why ``price`` is rejected or None, whether the consensus agrees)."""
+        deviation = series.deviation(price) if series else None
+        consensus = None
+        if not region:
+            consensus = self.consensus(source, iso_date, purity, others)
+        agrees = None
+        if consensus:
+            agrees = abs(price - consensus) / consensus <= CONSENSUS_TOLERANCE
+        if deviation is not None and deviation > MAX_DEVIATION and not agrees:
+            return (
+                f"{price} is {deviation:.1f} sd from the rolling mean "
+                f"{series.mean:.0f}"
+            ), agrees
+        if deviation is None and agrees is False:
+            return f"{price} is off the {consensus:.0f} cross-source median", agrees
+        return None, agrees
+
+
+def screen_results(results, stats: RollingStats, today_iso: str) -> list[str]:
+    """Drop implausible prices from ``results`` before reconciliation.
+
+    Checks the headline rates and each region's rates against ``stats``.
+    A rejected 24K price drops its whole rate set, since the other purities
+    would be derived from it; other purities are dropped one by one.
+    Intraday ticks behind a rejected price are dropped as well. Returns a
+    message per rejected price.
+    """
+    from scraper.scrape_gold import _rate_sets
+
+    # This run's headline prices, for the cross-source consensus
+    batch: dict[tuple[str, str], dict[str, int]] = {}
+    for result in results:
+        scraping_date = result.get("date") or today_iso
+        for purity, price in result.get("rates", {}).items():
+            parsed = _parse_price(price)
+            if parsed is not None:
+                batch.setdefault((scraping_date, purity), {})[result["source"]] = parsed
+
+    messages = []
+    for result in results:
+        source = result["source"]
+        screened = {}
+        for iso_date, region, rates in _rate_sets(result, today_iso):
+            kept = dict(rates)
+            for purity, value in rates.items():
+                price = _parse_price(value)
+                if price is None:
+                    continue
+                reason = stats.check(
+                    source,
+                    iso_date,
+                    purity,
+                    region,
+                    price,
+                    others=batch.get((iso_date, purity)),
+                )
+                if reason is None:
+                    continue
+                where = (
+                    f"{source} {region} {purity}" if region else f"{source} {purity}"
+                )
+                messages.append(f"{where} on {iso_date}: {reason}")
+                result.setdefault("rejected", []).append(
+                    {
+                        "date": iso_date,
+                        "region": region,
+                        "purity": purity,
+                        "price": price,
+                    }
+                )
+                if purity == "24K":
+                    kept = {}
+                    break
+                del kept[purity]
+            if len(kept) != len(rates):
+                screened[region] = kept
+        if not screened:
+            continue
+        if result.get("ticks"):
+            result["ticks"] = _screen_ticks(result["ticks"], result["rejected"])
+        # Replace the rate dicts rather than edit them: the response cache
+        # keeps the parsed result as it came from the source.
+        if "" in screened:
+            result["rates"] = screened.pop("")
+        if screened:
+            result["regions"] = {
+                region: (
+                    {**entry, "rates": screened[region]}
+                    if region in screened
+                    else entry
+                )
+                for region, entry in result["regions"].items()
+            }
+    return messages
+
+
+def _screen_ticks(ticks, rejected) -> list[dict]:
+    """The ticks not behind any of the ``rejected`` prices.
+
+    A rejected regional price drops that region's ticks of the purity (of
+    every purity for 24K) on its date; a rejected headline price drops the
+    ticks it was taken from, those of the purity and price on its date.
+    """
+    regional = set()
+    headline = set()
+    for entry in rejected:
+        if entry["region"]:
+            purity = None if entry["purity"] == "24K" else entry["purity"]
+            regional.add((entry["date"], entry["region"], purity))
+        else:
+            headline.add((entry["date"], entry["purity"], entry["price"]))
+    return [
+        tick
+        for tick in ticks
+        if (tick["observed_at"][:10], tick["region"], None) not in regional
+        and (tick["observed_at"][:10], tick["region"], tick["purity"]) not in regional
+        and (tick["observed_at"][:10], tick["purity"], tick["price_per_gm"])
+        not in headline
+    ]
+
+
+def _parse_price(value) -> int | None:
+    try:
+        return int(str(value).replace(",", "").split(".")[0])
+    except (ValueError, TypeError):
+        return None
@@ -1,50 +1,95 @@
 # Scraper script to fetch gold prices from Tanishq and Malabar Gold & Diamonds
 
+import contextvars
 import json
 import os
 import re
+import threading
+from concurrent.futures import FIRST_COMPLETED, wait
 from datetime import datetime, timedelta, timezone
+from html.parser import HTMLParser
 
-import requests
+import httpx
+
+from scraper import metrics
+from scraper.http_cache import CacheMiss, get_response_cache
+
+_IST = timezone(timedelta(hours=5, minutes=30))
+
+# Characters after a "24k gold" anchor searched for the city and price
+GOOGLE_CARD_WINDOW = 300
+
+_GOOGLE_ANCHOR_RE = re.compile(r"24k\s+gold", re.IGNORECASE)
+_GOOGLE_UNIT_RE = re.compile(r"(\d+)\s*g\s+of\s+$", re.IGNORECASE)
+_GOOGLE_CARD_TOKEN_RE = re.compile(
+    r"(?P<city>bengaluru|bangalore)|(?P<price>\d[\d,]*(?:\.\d+)?)\s*indian\s+rupee",
+    re.IGNORECASE,
+)
+_GOOGLE_RUPEE_RE = re.compile(r"indian\s+rupee", re.IGNORECASE)
+_GOOGLE_TRAILING_NUMBER_RE = re.compile(r"(\d[\d,]*(?:\.\d+)?)\s*$")
+
+
+def _grams_for(value):
+    return 10 if value > 50000 else 1
+
+
+def _parse_google_card(text):
+    """Parse the Google gold price card text; return (price, grams, city).
+
+    Looks for the first "24k gold" anchor followed by a rupee price within
+    GOOGLE_CARD_WINDOW characters, reading the unit ("10g of", "1g of") just
+    before the anchor and the city and price in one pass over the window.
+    Without an explicit unit, grams is inferred from the magnitude. With no
+    usable anchor the first rupee amount on the page is used. Work is bounded
+    by the window size per anchor, not by the length of the page.
+    """
+    for anchor in _GOOGLE_ANCHOR_RE.finditer(text):
+        window = text[anchor.end() : anchor.end() + GOOGLE_CARD_WINDOW]
+        city = None
+        for token in _GOOGLE_CARD_TOKEN_RE.finditer(window):
+            if token.group("city"):
+                city = city or token.group("city").title()
+                continue
+            value = float(token.group("price").replace(",", ""))
+            unit = _GOOGLE_UNIT_RE.search(
+                text, max(0, anchor.start() - 16), anchor.start()
+            )
+            grams = int(unit.group(1)) if unit else _grams_for(value)
+            return value, grams, city
+
+    rupee = _GOOGLE_RUPEE_RE.search(text)
+    if rupee:
+        number = _GOOGLE_TRAILING_NUMBER_RE.search(
+            text, max(0, rupee.start() - 32), rupee.start()
+        )
+        if number:
+            value = float(number.group(1).replace(",", ""))
+            return value, _grams_for(value), None
+
+    return None, None, None
 
 
 def _parse_google_gold_price(text):
     """Parse the Google gold price card text and return (price, grams)."""
-    normalized = " ".join(text.split())
-
-    patterns = [
-        (
-            r"10g of 24k gold.*?(Bengaluru|Bangalore).*?([0-9,]+(?:\.\d+)?)\s*Indian Rupee",
-            10,
-        ),
-        (
-            r"1g of 24k gold.*?(Bengaluru|Bangalore).*?([0-9,]+(?:\.\d+)?)\s*Indian Rupee",
-            1,
-        ),
-    ]
+    price, grams, _ = _parse_google_card(text)
+    return price, grams
 
-    for pattern, grams in patterns:
-        match = re.search(pattern, normalized, re.IGNORECASE)
-        if match:
-            value = float(match.group(2).replace(",", ""))
-            return value, grams
 
-    idx = normalized.lower().find("24k gold")
-    if idx != -1:
-        window = normalized[idx : idx + 300]
-        match = re.search(r"([0-9,]+(?:\.\d+)?)\s*Indian Rupee", window)
-        if match:
-            value = float(match.group(1).replace(",", ""))
-            grams = 10 if value > 50000 else 1
-            return value, grams
+def _outermost_texts(texts):
+    """Drop candidate texts contained in another candidate.
 
-    match = re.search(r"([0-9,]+(?:\.\d+)?)\s*Indian Rupee", normalized)
-    if match:
-        value = float(match.group(1).replace(",", ""))
-        grams = 10 if value > 50000 else 1
-        return value, grams
-
-    return None, None
+    Nested elements repeat their children's text, and the bounded parser
+    reads the same anchor window either way, so only the outermost copy is
+    kept (in the original order).
+    """
+    kept = []
+    for text in sorted(set(texts), key=len, reverse=True):
+        if not any(text in other for other in kept):
+            kept.append(text)
+    position = {}
+    for index, text in enumerate(texts):
+        position.setdefault(text, index)
+    return sorted(kept, key=position.__getitem__)
 
 
 def _parse_google_date(text):
@@ -77,21 +122,113 @@ def _parse_google_date(text):
     if not month:
         return None
 
-    now_tz = datetime.now(timezone(timedelta(hours=5, minutes=30)))
+    now_tz = datetime.now(_IST)
     try:
         return datetime(now_tz.year, month, day).date().isoformat()
     except ValueError:
         return None
 
 
-def scrape_tanishq_gold_price():
-    """Scrape gold prices from Tanishq website using requests + BeautifulSoup."""
-    import random
-    import time
+TANISHQ_HOME_URL = "https://www.tanishq.co.in/"
+TANISHQ_RATE_URL = "https://www.tanishq.co.in/gold-rate.html?lang=en_IN"
+TANISHQ_COOKIE_DOMAIN = "tanishq.co.in"
+
+_TANISHQ_DATE_RE = re.compile(r"(\d{2})-(\d{2})-(\d{4})")
+_TANISHQ_RATE_TAG_RE = re.compile(r"<span\b[^>]*goldpurity-rate[^>]*>", re.IGNORECASE)
+# Longest unterminated tag kept across chunks before it is given up on
+_TANISHQ_MAX_TAG_LENGTH = 4096
+
+
+class _StartTagAttrs(HTMLParser):
+    """Read the attributes of a single start tag."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.attrs = None
+
+    def handle_starttag(self, tag, attrs):
+        if self.attrs is None:
+            self.attrs = {name: value or "" for name, value in attrs}
+
+
+def _parse_start_tag(tag_text):
+    parser = _StartTagAttrs()
+    parser.feed(tag_text)
+    parser.close()
+    return parser.attrs or {}
 
-    from bs4 import BeautifulSoup
 
-    url = "https://www.tanishq.co.in/gold-rate.html?lang=en_IN"
+class _TanishqRateScanner:
+    """Pick today's rates out of the Tanishq page as it streams in.
+
+    The first ``span.goldpurity-rate`` carries today's rates as
+    ``data-goldrate*`` attributes and the first ``DD-MM-YYYY`` on the page
+    is the rate date. Scanning stops as soon as both have been seen, and
+    only a short tail of each chunk is carried over to the next.
+    """
+
+    def __init__(self):
+        self.rate_attrs = None
+        self.date = None
+        self._buffer = ""
+
+    def feed(self, chunk):
+        """Consume a chunk; return True once the rates and date are found."""
+        text = self._buffer + chunk
+
+        if self.date is None:
+            date_match = _TANISHQ_DATE_RE.search(text)
+            if date_match:
+                d, m, y = date_match.groups()
+                self.date = f"{y}-{m}-{d}"
+
+        if self.rate_attrs is None:
+            for tag_match in _TANISHQ_RATE_TAG_RE.finditer(text):
+                attrs = _parse_start_tag(tag_match.group(0))
+                if "goldpurity-rate" in attrs.get("class", "").split():
+                    self.rate_attrs = attrs
+                    break
+
+        if self.rate_attrs is not None and self.date is not None:
+            return True
+
+        # Keep enough to complete a date or a start tag cut by the chunk edge
+        keep_from = len(text) - 9
+        open_tag = text.rfind("<")
+        if open_tag != -1 and text.find(">", open_tag) == -1:
+            keep_from = min(keep_from, open_tag)
+        keep_from = max(keep_from, len(text) - _TANISHQ_MAX_TAG_LENGTH, 0)
+        self._buffer = text[keep_from:]
+        return False
+
+
+async def _extract_tanishq_payload(response):
+    """Stream the rate page; return the rate attributes and date as JSON."""
+    scanner = _TanishqRateScanner()
+    async for chunk in response.aiter_text():
+        if scanner.feed(chunk):
+            break
+    if scanner.rate_attrs is None:
+        return None
+    attrs = {
+        name: value
+        for name, value in scanner.rate_attrs.items()
+        if name.startswith("data-goldrate")
+    }
+    return json.dumps({"attrs": attrs, "date": scanner.date}, sort_keys=True)
+
+
+async def scrape_tanishq_gold_price(client: httpx.AsyncClient):
+    """Scrape gold prices from Tanishq website.
+
+    Session cookies are saved between runs, so the homepage warm-up hop (and
+    its pacing delays) only happens when there are no usable cookies or the
+    rate page rejects them. The rate page goes through the response cache.
+    """
+    import asyncio
+    import random
+
+    from scraper.state import clear_cookies, load_cookies, save_cookies, state_path
 
     # More comprehensive headers to bypass anti-bot
     headers = {
@@ -111,56 +248,75 @@ def scrape_tanishq_gold_price():
         "sec-ch-ua-mobile": "?0",
         "sec-ch-ua-platform": '"macOS"',
     }
+    # The rate page is requested as if navigated to from the homepage
+    rate_headers = {
+        **headers,
+        "Referer": TANISHQ_HOME_URL,
+        "Sec-Fetch-Site": "same-origin",
+    }
 
     results = {"source": "Tanishq", "success": False, "rates": {}, "error": None}
+    cookie_path = state_path("tanishq_cookies.lwp")
+    cache = get_response_cache()
 
     try:
-        # Create a session to handle cookies
-        session = requests.Session()
-
-        # Add a small random delay before starting
-        time.sleep(random.uniform(1, 3))
-
-        # First visit home page to get necessary cookies, mimicking a user coming from Google
-        session.get("https://www.tanishq.co.in/", headers=headers, timeout=20)
-
-        # Update referer for the actual page request
-        headers["Referer"] = "https://www.tanishq.co.in/"
-        headers["Sec-Fetch-Site"] = "same-origin"
+        warm = load_cookies(client, cookie_path) > 0 or cache.replay
 
-        # Wait a bit more before fetching the gold rate page
-        time.sleep(random.uniform(1, 2))
+        for _ in range(2):
+            if not warm:
+                # First visit home page to get necessary cookies, mimicking a user coming from Google
+                await asyncio.sleep(random.uniform(0.5, 1.5))
+                home = await client.get(TANISHQ_HOME_URL, headers=headers)
+                metrics.observe("bytes_downloaded", home.num_bytes_downloaded)
+                await asyncio.sleep(random.uniform(0.5, 1))
 
-        # Fetch the gold rate page
-        response = session.get(url, headers=headers, timeout=20)
-        response.raise_for_status()
-
-        # Parse the page
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        # Find the first span with gold rate data attributes
-        # The gold rates are embedded as data attributes in span.goldpurity-rate elements
-        # The first occurrence contains today's rates
-        rate_span = soup.find("span", class_="goldpurity-rate")
+            try:
+                fetched = await cache.fetch(
+                    client,
+                    TANISHQ_RATE_URL,
+                    headers=rate_headers,
+                    extract=_extract_tanishq_payload,
+                )
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code not in (401, 403) or not warm:
+                    raise
+                # Saved cookies were rejected: start a fresh session
+                clear_cookies(client, cookie_path, TANISHQ_COOKIE_DOMAIN)
+                warm = False
+                metrics.observe("retries")
+                continue
 
-        if rate_span:
-            # Extract prices from data attributes (values are per gram in INR)
-            gold_22k = rate_span.get("data-goldrate22kt", "Not found")
-            gold_24k = rate_span.get("data-goldrate24kt", "Not found")
-            gold_18k = rate_span.get("data-goldrate18kt", "Not found")
+            if fetched.payload is None and warm and not cache.replay:
+                clear_cookies(client, cookie_path, TANISHQ_COOKIE_DOMAIN)
+                warm = False
+                metrics.observe("retries")
+                continue
+            break
 
-            results["rates"] = {"22K": gold_22k, "24K": gold_24k, "18K": gold_18k}
+        if fetched.unchanged:
+            save_cookies(client, cookie_path, TANISHQ_COOKIE_DOMAIN)
+            return fetched.result
+
+        if fetched.payload is not None:
+            with metrics.timed("parse_seconds"):
+                payload = json.loads(fetched.payload)
+                rate_attrs = payload["attrs"]
+                # Extract prices from data attributes (values are per gram in INR)
+                results["rates"] = {
+                    "22K": rate_attrs.get("data-goldrate22kt", "Not found"),
+                    "24K": rate_attrs.get("data-goldrate24kt", "Not found"),
+                    "18K": rate_attrs.get("data-goldrate18kt", "Not found"),
+                }
             results["success"] = True
-
-            # Extract date from page (format: DD-MM-YYYY)
-            date_match = re.search(r"(\d{2})-(\d{2})-(\d{4})", response.text)
-            if date_match:
-                d, m, y = date_match.groups()
-                results["date"] = f"{y}-{m}-{d}"
+            if payload.get("date"):
+                results["date"] = payload["date"]
+            cache.stage(fetched, results)
+            if not cache.replay:
+                save_cookies(client, cookie_path, TANISHQ_COOKIE_DOMAIN)
         else:
             results["error"] = "Could not find gold rate element on page"
 
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         results["error"] = f"Request failed: {str(e)}"
     except Exception as e:
         results["error"] = str(e)
@@ -168,136 +324,320 @@ def scrape_tanishq_gold_price():
     return results
 
 
-def scrape_google_gold_price():
-    """Scrape gold prices from Google search card using Selenium."""
+GOOGLE_SEARCH_URL = (
+    "https://www.google.com/search?q=gold+price+india+bangalore&hl=en&gl=IN"
+)
+GOOGLE_USER_AGENT_PROFILES = [
+    (
+        "Mozilla/5.0 (Linux; Android 12; Pixel 6) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Mobile Safari/537.36",
+        "412,915",
+    ),
+    (
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+        "1280,720",
+    ),
+    (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
+        "1280,720",
+    ),
+]
+GOOGLE_HEADLESS_MODES = ["--headless=new", "--headless=old"]
+# Browser profiles tried at once, each in its own Chrome (1 = one at a time)
+GOOGLE_RACE_WIDTH = int(os.environ.get("SCRAPER_GOOGLE_RACE_WIDTH", "1"))
+GOOGLE_PROFILE_STATE_FILE = "google_profile.json"
+
+
+GOOGLE_HTTP_HEADERS = {
+    "User-Agent": GOOGLE_USER_AGENT_PROFILES[1][0],
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-IN,en;q=0.9",
+}
+
+
+class _TextExtractor(HTMLParser):
+    """Collect visible text from HTML, skipping script and style bodies."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("script", "style", "noscript"):
+            self._skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style", "noscript") and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+
+def _html_to_text(html):
+    """Return the visible text of an HTML document, whitespace-separated."""
+    extractor = _TextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    return " ".join(extractor.parts)
+
+
+async def _extract_google_text(response):
+    """Return the visible text of the results page, or None if blocked."""
+    await response.aread()
+    if _is_google_block_page(response.status_code, str(response.url), response.text):
+        return None
+    return _html_to_text(response.text)
+
+
+def _is_google_block_page(status_code, url, text):
+    lowered = text.lower()
+    return (
+        status_code == 429
+        or "/sorry/" in url
+        or "unusual traffic" in lowered
+        or "recaptcha" in lowered
+    )
+
+
+def _apply_google_price(results, price, grams, body_text, city=None):
+    """Fill results with per-gram rates derived from the Google 24K price.
+
+    The card's city is noted on the result but not stored as a region: its
+    rates are the headline rates, and a second row would only repeat them.
+    """
+    from scraper.purity import derived_rates
+
+    price_per_gram_24k = int(round(price / grams))
+    results["rates"] = {"24K": str(price_per_gram_24k)}
+    for purity, derived_price in derived_rates(price_per_gram_24k).items():
+        results["rates"][purity] = str(derived_price)
+    results["success"] = True
+
+    scraped_date = _parse_google_date(body_text)
+    if scraped_date:
+        results["date"] = scraped_date
+    if city:
+        results["city"] = city
+
+
+async def scrape_google_gold_price(client: httpx.AsyncClient):
+    """Scrape gold prices from Google, launching Chrome only as a fallback.
+
+    One plain HTTP fetch of the search results goes through the same text
+    parsers as the browser path; Selenium runs only when that fetch is
+    blocked or its text cannot be parsed.
+    """
+    from scraper.engine import run_blocking
+
     results = {"source": "Google", "success": False, "rates": {}, "error": None}
+    http_error = None
+    cache = get_response_cache()
 
     try:
-        from selenium import webdriver
-        from selenium.webdriver.chrome.options import Options
-        from selenium.webdriver.common.by import By
-        from selenium.webdriver.support import expected_conditions as EC
-        from selenium.webdriver.support.ui import WebDriverWait
-
-        def build_driver(user_agent, headless_arg, window_size):
-            options = Options()
-            options.add_argument(headless_arg)
-            options.add_argument("--disable-gpu")
-            options.add_argument("--no-sandbox")
-            options.add_argument("--disable-dev-shm-usage")
-            options.add_argument(f"--window-size={window_size}")
-            options.add_argument("--lang=en-IN")
-            options.add_argument("--disable-blink-features=AutomationControlled")
-            options.add_argument("--disable-extensions")
-            options.add_argument("--disable-popup-blocking")
-            options.add_argument("--user-data-dir=/tmp/chrome-google-scrape")
-            options.add_argument(f"--user-agent={user_agent}")
-            options.add_experimental_option(
-                "excludeSwitches", ["enable-automation", "enable-logging"]
+        fetched = await cache.fetch(
+            client,
+            GOOGLE_SEARCH_URL,
+            headers=GOOGLE_HTTP_HEADERS,
+            extract=_extract_google_text,
+        )
+        if fetched.unchanged:
+            return fetched.result
+        if fetched.payload is None:
+            http_error = "Blocked by Google captcha"
+        else:
+            body_text = fetched.payload
+            with metrics.timed("parse_seconds"):
+                price, grams, city = _parse_google_card(body_text)
+            if price is not None:
+                _apply_google_price(results, price, grams, body_text, city)
+                cache.stage(fetched, results)
+                return results
+            http_error = "Could not parse price from Google HTML"
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 429:
+            http_error = "Blocked by Google captcha"
+        else:
+            http_error = f"Request failed: {str(e)}"
+    except httpx.HTTPError as e:
+        http_error = f"Request failed: {str(e)}"
+    except CacheMiss as e:
+        http_error = str(e)
+
+    if cache.replay:
+        # Offline runs never launch a browser
+        results["error"] = http_error
+        return results
+
+    results = await run_blocking(_scrape_google_gold_price_browser)
+    if not results["success"]:
+        results["error"] = f"{results['error']} (HTTP path: {http_error})"
+    return results
+
+
+def _google_profiles():
+    """Every (headless_arg, user_agent, window_size) browser profile.
+
+    Profiles stay grouped by headless mode. The mode of the profile that
+    last parsed a price goes first, led by that profile; the rest keep
+    their default order.
+    """
+    from scraper.state import state_path
+
+    modes = list(GOOGLE_HEADLESS_MODES)
+    winner = None
+    try:
+        with open(state_path(GOOGLE_PROFILE_STATE_FILE), encoding="utf-8") as f:
+            winner = tuple(json.load(f)["profile"])
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    if winner and winner[0] in modes:
+        modes.remove(winner[0])
+        modes.insert(0, winner[0])
+    profiles = [
+        (headless_arg, user_agent, window_size)
+        for headless_arg in modes
+        for user_agent, window_size in GOOGLE_USER_AGENT_PROFILES
+    ]
+    if winner in profiles:
+        profiles.remove(winner)
+        profiles.insert(0, winner)
+    return profiles
+
+
+def _remember_google_profile(profile):
+    from scraper.state import state_path
+
+    path = state_path(GOOGLE_PROFILE_STATE_FILE)
+    tmp_path = path.with_suffix(".tmp")
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"profile": list(profile)}, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Could not save the Google browser profile: {str(e)}")
+
+
+def _try_google_profile(slot, profile, cancelled):
+    """Load the Google card with one browser profile on session ``slot``.
+
+    Returns (results, None) once a price parses, else (None, error). Stops
+    early, without a result, once ``cancelled`` is set.
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    from scraper.browser import get_browser_session
+
+    headless_arg, user_agent, window_size = profile
+    session = get_browser_session(slot)
+    with session.lock:
+        if cancelled.is_set():
+            return None, "Cancelled"
+        metrics.observe("google_profiles_tried")
+        try:
+            driver = session.driver(user_agent, headless_arg, window_size)
+        except Exception as e:
+            session.reset()
+            return None, f"Chrome start failed ({headless_arg}): {str(e)}"
+
+        try:
+            driver.get(GOOGLE_SEARCH_URL)
+
+            # Poll for the body, giving up as soon as another profile wins
+            WebDriverWait(driver, 20).until(
+                lambda d: cancelled.is_set() or d.find_elements(By.TAG_NAME, "body")
             )
-            options.add_experimental_option("useAutomationExtension", False)
-
-            chrome_bin = os.environ.get("CHROME_BIN")
-            if chrome_bin:
-                options.binary_location = chrome_bin
-
-            return webdriver.Chrome(options=options)
-
-        user_agent_profiles = [
-            (
-                "Mozilla/5.0 (Linux; Android 12; Pixel 6) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Mobile Safari/537.36",
-                "412,915",
-            ),
-            (
-                "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                "1280,720",
-            ),
-            (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
-                "1280,720",
-            ),
-        ]
-        headless_modes = ["--headless=new", "--headless=old"]
+            if cancelled.is_set():
+                return None, "Cancelled"
+
+            page_source = driver.page_source.lower()
+            if "unusual traffic" in page_source or "recaptcha" in page_source:
+                return None, "Blocked by Google captcha"
+
+            # Try targeted extraction first
+            candidate_texts = []
+            for el in driver.find_elements(
+                By.XPATH,
+                "//*[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'), '24k gold')]",
+            ):
+                text = el.text.strip()
+                if text:
+                    candidate_texts.append(text)
+
+            candidate_texts = _outermost_texts(candidate_texts)
+            body_text = driver.find_element(By.TAG_NAME, "body").text
+            candidate_texts.append(body_text)
+
+            price = grams = city = None
+            with metrics.timed("parse_seconds"):
+                for text in candidate_texts:
+                    price, grams, city = _parse_google_card(text)
+                    if price is not None:
+                        break
+
+            if price is None:
+                return None, "Could not parse price from Google card"
+
+            results = {"source": "Google", "success": False, "rates": {}, "error": None}
+            _apply_google_price(results, price, grams, body_text, city)
+            return results, None
+        except Exception as e:
+            # A crashed or wedged driver is relaunched for the next profile
+            session.reset()
+            return None, f"Google page load failed ({headless_arg}): {str(e)}"
+
+
+def _scrape_google_gold_price_browser():
+    """Scrape gold prices from Google search card using Selenium.
+
+    Profiles are tried in _google_profiles() order, GOOGLE_RACE_WIDTH at a
+    time, each on its own Chrome session. The first profile to parse a
+    price wins and is remembered for the next run; the others are told to
+    stop and finish in the background, so a run waits on one profile
+    rather than on every profile tried before it.
+    """
+    from scraper.engine import submit_daemon
 
-        last_error = None
+    results = {"source": "Google", "success": False, "rates": {}, "error": None}
 
-        for headless_arg in headless_modes:
-            for user_agent, window_size in user_agent_profiles:
-                try:
-                    driver = build_driver(user_agent, headless_arg, window_size)
-                except Exception as e:
-                    last_error = f"Chrome start failed ({headless_arg}): {str(e)}"
-                    continue
+    try:
+        profiles = _google_profiles()
+        width = max(1, min(GOOGLE_RACE_WIDTH, len(profiles)))
+        cancelled = threading.Event()
+        free_slots = list(range(width))
+        running = {}
+        last_error = None
 
-                try:
-                    driver.execute_script(
-                        "Object.defineProperty(navigator, 'webdriver', {get: () => undefined});"
-                    )
-                    driver.execute_cdp_cmd(
-                        "Network.setUserAgentOverride",
-                        {
-                            "userAgent": user_agent,
-                            "platform": "Linux x86_64",
-                            "acceptLanguage": "en-IN,en;q=0.9",
-                        },
-                    )
-
-                    url = "https://www.google.com/search?q=gold+price+india+bangalore&hl=en&gl=IN"
-                    driver.get(url)
-
-                    WebDriverWait(driver, 20).until(
-                        EC.presence_of_element_located((By.TAG_NAME, "body"))
-                    )
-
-                    page_source = driver.page_source.lower()
-                    if "unusual traffic" in page_source or "recaptcha" in page_source:
-                        last_error = "Blocked by Google captcha"
-                        continue
-
-                    # Try targeted extraction first
-                    candidate_texts = []
-                    for el in driver.find_elements(
-                        By.XPATH,
-                        "//*[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'), '24k gold')]",
-                    ):
-                        text = el.text.strip()
-                        if text:
-                            candidate_texts.append(text)
-
-                    body_text = driver.find_element(By.TAG_NAME, "body").text
-                    candidate_texts.append(body_text)
-
-                    price = None
-                    grams = None
-                    for text in candidate_texts:
-                        price, grams = _parse_google_gold_price(text)
-                        if price is not None:
-                            break
-
-                    if price is None:
-                        last_error = "Could not parse price from Google card"
-                        continue
-
-                    price_per_gram_24k = int(round(price / grams))
-                    price_per_gram_22k = int(round(price_per_gram_24k * 22 / 24))
-                    price_per_gram_18k = int(round(price_per_gram_24k * 18 / 24))
-                    price_per_gram_9k = int(round(price_per_gram_24k * 9 / 24))
-
-                    results["rates"] = {
-                        "24K": str(price_per_gram_24k),
-                        "22K": str(price_per_gram_22k),
-                        "18K": str(price_per_gram_18k),
-                        "9K": str(price_per_gram_9k),
-                    }
-                    results["success"] = True
-
-                    scraped_date = _parse_google_date(body_text)
-                    if scraped_date:
-                        results["date"] = scraped_date
-
-                    return results
-                finally:
-                    driver.quit()
+        def start_next():
+            profile = profiles.pop(0)
+            slot = free_slots.pop()
+            # Each attempt records metrics against the Google source
+            context = contextvars.copy_context()
+            # A daemon thread, so a wedged Chrome cannot hold the process
+            future = submit_daemon(
+                context.run, _try_google_profile, slot, profile, cancelled
+            )
+            running[future] = (slot, profile)
+
+        try:
+            while profiles and free_slots:
+                start_next()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    slot, profile = running.pop(future)
+                    free_slots.append(slot)
+                    scraped, error = future.result()
+                    if scraped is not None:
+                        _remember_google_profile(profile)
+                        return scraped
+                    last_error = error
+                while profiles and free_slots:
+                    start_next()
+        finally:
+            cancelled.set()
 
         results["error"] = last_error or "Could not fetch Google results"
 
@@ -317,8 +657,194 @@ MALABAR_METAL_RATE_FILTER = {"metal_type": "gold", "country": "India"}
 MALABAR_TARGET_PURITIES = {"24k": "24K", "22k": "22K", "18k": "18K", "9k": "9K"}
 
 
-def scrape_malabar_gold_price():
-    """Scrape gold prices from Malabar Gold & Diamonds GraphQL API."""
+MALABAR_ITEMS_MARKER = '"items":'
+# Prefix of a response without an items array kept to report its errors
+MALABAR_MAX_ERROR_BODY = 64 * 1024
+
+
+class _JsonArrayItemScanner:
+    """Decode the elements of the JSON array after ``marker`` as text streams in.
+
+    Each complete element is returned from feed() as soon as its closing
+    brace arrives, so only the unfinished element is buffered; ``done`` is
+    set at the closing bracket of the array.
+    """
+
+    def __init__(self, marker):
+        self.marker = marker
+        self.started = False
+        self.done = False
+        self._buffer = ""
+        self._decoder = json.JSONDecoder()
+
+    def feed(self, chunk):
+        """Consume a chunk; return the elements completed by it."""
+        text = self._buffer + chunk
+        if not self.started:
+            while True:
+                idx = text.find(self.marker)
+                if idx == -1:
+                    self._buffer = text[-(len(self.marker) - 1) :]
+                    return []
+                rest = text[idx + len(self.marker) :].lstrip()
+                if not rest:
+                    # Wait for the value after the marker
+                    self._buffer = text[idx:]
+                    return []
+                if rest[0] == "[":
+                    text = rest[1:]
+                    self.started = True
+                    break
+                text = rest
+
+        elements = []
+        pos = 0
+        while not self.done:
+            while pos < len(text) and text[pos] in " \t\r\n,":
+                pos += 1
+            if pos == len(text):
+                break
+            if text[pos] == "]":
+                self.done = True
+                break
+            try:
+                element, pos = self._decoder.raw_decode(text, pos)
+            except json.JSONDecodeError:
+                # Element not complete yet
+                break
+            elements.append(element)
+        self._buffer = text[pos:]
+        return elements
+
+
+def _keep_latest(latest, item):
+    """Fold one rate item into the latest item per (state, purity)."""
+    purity_key = item.get("purity", "").lower()
+    if purity_key not in MALABAR_TARGET_PURITIES:
+        return
+    key = (item.get("state") or "", purity_key)
+    entry_key = (item.get("entry_date", ""), item.get("entry_time", ""))
+    if key not in latest or entry_key > latest[key][0]:
+        latest[key] = (entry_key, item)
+
+
+def _keep_tick(ticks, item):
+    """Fold one rate item into the distinct ticks per (state, purity, time)."""
+    purity_key = item.get("purity", "").lower()
+    if purity_key not in MALABAR_TARGET_PURITIES:
+        return
+    key = (
+        item.get("state") or "",
+        purity_key,
+        item.get("entry_date", ""),
+        item.get("entry_time", ""),
+    )
+    ticks[key] = item
+
+
+def _malabar_ticks(items):
+    """Intraday ticks (see scraper.db.append_ticks) from rate items.
+
+    Items without a usable entry date and time or rate are skipped.
+    """
+    ticks = []
+    for item in items:
+        label = MALABAR_TARGET_PURITIES.get(item.get("purity", "").lower())
+        if label is None:
+            continue
+        try:
+            observed_at = datetime.fromisoformat(
+                f"{item.get('entry_date', '')[:10]}T{item.get('entry_time', '')}"
+            ).replace(tzinfo=_IST)
+            price = int(str(item.get("rate", "")).replace(",", "").split(".")[0])
+        except ValueError:
+            continue
+        ticks.append(
+            {
+                "region": item.get("state") or "",
+                "purity": label,
+                "observed_at": observed_at.isoformat(),
+                "price_per_gm": price,
+            }
+        )
+    return ticks
+
+
+def _latest_by_region(items):
+    """Return the most recent rate item per (state, purity).
+
+    Maps (state, lowercased purity) to ((entry_date, entry_time), item) for
+    the target purities.
+    """
+    latest = {}
+    for item in items:
+        _keep_latest(latest, item)
+    return latest
+
+
+def _latest_by_purity(latest_by_region):
+    """Reduce per-state latest items to the latest per purity across states.
+
+    Maps the lowercased purity to ((entry_date, entry_time), item).
+    """
+    latest_by_purity = {}
+    for (_, purity_key), (entry_key, item) in latest_by_region.items():
+        if (
+            purity_key not in latest_by_purity
+            or entry_key > latest_by_purity[purity_key][0]
+        ):
+            latest_by_purity[purity_key] = (entry_key, item)
+    return latest_by_purity
+
+
+def _malabar_rates(latest_by_purity):
+    """Per-gram rates and the 24K entry date from latest items per purity."""
+    rates = {}
+    for purity_key, label in MALABAR_TARGET_PURITIES.items():
+        if purity_key not in latest_by_purity:
+            continue
+        item = latest_by_purity[purity_key][1]
+        rate_str = str(item.get("rate", "")).replace(",", "").split(".")[0]
+        if rate_str:
+            rates[label] = rate_str
+    entry_date = None
+    if "24k" in latest_by_purity:
+        entry_date = latest_by_purity["24k"][1].get("entry_date", "")[:10] or None
+    return rates, entry_date
+
+
+async def _extract_malabar_rates(response):
+    """Stream the GraphQL response, keeping each distinct rate tick once.
+
+    Items repeating a (state, purity, entry date, entry time) seen before
+    are dropped. Returns the list of distinct items, or the response body
+    itself when it has no items array (e.g. a GraphQL error).
+    """
+    scanner = _JsonArrayItemScanner(MALABAR_ITEMS_MARKER)
+    ticks = {}
+    head = []
+    head_size = 0
+    async for chunk in response.aiter_text():
+        if head_size < MALABAR_MAX_ERROR_BODY:
+            head.append(chunk)
+            head_size += len(chunk)
+        for item in scanner.feed(chunk):
+            _keep_tick(ticks, item)
+        if scanner.done:
+            break
+    if not scanner.started:
+        return "".join(head)
+    return [ticks[key] for key in sorted(ticks)]
+
+
+async def scrape_malabar_gold_price(client: httpx.AsyncClient):
+    """Scrape gold prices from Malabar Gold & Diamonds GraphQL API.
+
+    The one all-India request returns rates for every state. The headline
+    rates are the latest per purity across states, as before; the latest
+    rates of each state are returned under ``regions``, and every distinct
+    intraday rate the response carries under ``ticks``.
+    """
     results = {
         "source": "Malabar Gold & Diamonds",
         "success": False,
@@ -332,61 +858,67 @@ def scrape_malabar_gold_price():
         "Referer": "https://www.malabargoldanddiamonds.com/",
     }
 
+    cache = get_response_cache()
+
     try:
-        response = requests.get(
+        fetched = await cache.fetch(
+            client,
             MALABAR_GRAPHQL_URL,
             params={
                 "query": MALABAR_METAL_RATE_QUERY,
                 "variables": json.dumps({"filter": MALABAR_METAL_RATE_FILTER}),
             },
             headers=headers,
-            timeout=20,
+            extract=_extract_malabar_rates,
         )
-        response.raise_for_status()
-        payload = response.json()
-
-        if payload.get("errors"):
-            first_error = payload["errors"][0]
-            message = first_error.get("message", str(first_error))
-            results["error"] = message
-            return results
-
-        items = payload.get("data", {}).get("getMetalRate", {}).get("items")
+        if fetched.unchanged:
+            return fetched.result
+        items = fetched.payload
+        if isinstance(items, str):
+            # The whole body: an error response, or a cache entry recorded
+            # before items were stored decoded
+            with metrics.timed("parse_seconds"):
+                payload = json.loads(items)
+
+            if payload.get("errors"):
+                first_error = payload["errors"][0]
+                message = first_error.get("message", str(first_error))
+                results["error"] = message
+                return results
+
+            items = ((payload.get("data") or {}).get("getMetalRate") or {}).get("items")
         if not items:
             results["error"] = "No rates found in GraphQL response"
             return results
 
-        latest_by_purity = {}
-        for item in items:
-            purity_key = item.get("purity", "").lower()
-            if purity_key not in MALABAR_TARGET_PURITIES:
-                continue
-            entry_key = (item.get("entry_date", ""), item.get("entry_time", ""))
-            if (
-                purity_key not in latest_by_purity
-                or entry_key > latest_by_purity[purity_key][0]
-            ):
-                latest_by_purity[purity_key] = (entry_key, item)
-
-        for purity_key, label in MALABAR_TARGET_PURITIES.items():
-            if purity_key not in latest_by_purity:
-                continue
-            item = latest_by_purity[purity_key][1]
-            rate_str = str(item.get("rate", "")).replace(",", "").split(".")[0]
-            if rate_str:
-                results["rates"][label] = rate_str
-
-        if "24k" in latest_by_purity:
-            entry_date = latest_by_purity["24k"][1].get("entry_date", "")
+        with metrics.timed("parse_seconds"):
+            latest_by_region = _latest_by_region(items)
+            results["rates"], entry_date = _malabar_rates(
+                _latest_by_purity(latest_by_region)
+            )
             if entry_date:
-                results["date"] = entry_date[:10]
+                results["date"] = entry_date
+
+            by_state = {}
+            for (state, purity_key), latest in latest_by_region.items():
+                if state:
+                    by_state.setdefault(state, {})[purity_key] = latest
+            regions = {}
+            for state, latest_by_purity in sorted(by_state.items()):
+                rates, state_date = _malabar_rates(latest_by_purity)
+                if rates:
+                    regions[state] = {"date": state_date, "rates": rates}
+            if regions:
+                results["regions"] = regions
+            results["ticks"] = _malabar_ticks(items)
 
         if results["rates"]:
             results["success"] = True
+            cache.stage(fetched, results)
         else:
             results["error"] = "No rates found in GraphQL response"
 
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         results["error"] = f"Request failed: {str(e)}"
     except Exception as e:
         results["error"] = str(e)
@@ -396,7 +928,8 @@ def scrape_malabar_gold_price():
 
 def display_results(results):
     """Display the scraped gold rates."""
-    print(f"\n{results['source']} Gold Rates (per gram):")
+    city = f" ({results['city']})" if results.get("city") else ""
+    print(f"\n{results['source']}{city} Gold Rates (per gram):")
     print("-" * 40)
 
     if results["success"]:
@@ -405,11 +938,95 @@ def display_results(results):
             if karat in results["rates"]:
                 price = results["rates"][karat]
                 print(f"  {karat}: ₹{price}")
+        if results.get("regions"):
+            print(f"  + rates for {len(results['regions'])} region(s)")
     else:
         print(f"  Error: {results['error']}")
 
 
-def scrape_grt_gold_price():
+GRT_HOME_URL = "https://www.grtjewels.com/"
+# Note: The JSON uses escaped quotes \"key\": value
+GRT_GOLD_RATE_MARKER = '\\"gold_rate\\":'
+
+
+class _MarkerArrayScanner:
+    """Find the JSON array that follows a marker in incrementally fed text.
+
+    Matches the marker, optional whitespace and a bracketed array like a regex
+    over the whole document would, but the marker may straddle chunk
+    boundaries and only a marker-sized tail of unrelated text is retained
+    between chunks.
+    """
+
+    def __init__(self, marker):
+        self.marker = marker
+        self._tail = ""
+        self._parts = None
+        self._depth = 0
+
+    def feed(self, chunk):
+        """Consume a chunk; return the array text once it is complete."""
+        text = self._tail + chunk
+        self._tail = ""
+        while text:
+            if self._parts is None:
+                idx = text.find(self.marker)
+                if idx == -1:
+                    self._tail = text[-(len(self.marker) - 1) :]
+                    return None
+                text = text[idx + len(self.marker) :].lstrip()
+                if not text:
+                    # Whitespace (or nothing yet) after the marker: wait for more
+                    self._tail = self.marker
+                    return None
+                if text[0] != "[":
+                    continue
+                self._parts = []
+                self._depth = 0
+
+            for pos, char in enumerate(text):
+                if char == "[":
+                    self._depth += 1
+                elif char == "]":
+                    self._depth -= 1
+                    if self._depth == 0:
+                        self._parts.append(text[: pos + 1])
+                        return "".join(self._parts)
+            self._parts.append(text)
+            return None
+        return None
+
+
+async def _extract_grt_gold_rate(response):
+    """Stream the homepage; return the gold_rate array text once complete."""
+    scanner = _MarkerArrayScanner(GRT_GOLD_RATE_MARKER)
+    async for chunk in response.aiter_text():
+        array_text = scanner.feed(chunk)
+        if array_text is not None:
+            return array_text
+    return None
+
+
+def _parse_grt_gold_rates(array_text):
+    """Per-gram gold rates by karat from the escaped gold_rate array text."""
+    # Clean the extracted string by unescaping quotes
+    cleaned_json = array_text.replace(r"\"", '"')
+    gold_rates = json.loads(cleaned_json)
+
+    rates = {}
+    for rate in gold_rates:
+        if rate.get("type") == "GOLD" and rate.get("unit") == "G":
+            purity_str = rate.get("purity")  # e.g., "22 KT", "24 KT"
+            amount = rate.get("amount")
+
+            if purity_str and amount:
+                # Convert "22 KT" -> "22K"
+                karat = purity_str.replace(" KT", "K").strip()
+                rates[karat] = str(amount)
+    return rates
+
+
+async def scrape_grt_gold_price(client: httpx.AsyncClient):
     """Scrape gold prices from GRT Jewels website."""
     results = {"source": "GRT Jewels", "success": False, "rates": {}, "error": None}
 
@@ -417,39 +1034,31 @@ def scrape_grt_gold_price():
         "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
     }
+    cache = get_response_cache()
 
     try:
-        response = requests.get(
-            "https://www.grtjewels.com/", headers=headers, timeout=20
+        # Stream the homepage and stop reading as soon as the gold_rate array
+        # is complete; returning early closes the connection.
+        fetched = await cache.fetch(
+            client, GRT_HOME_URL, headers=headers, extract=_extract_grt_gold_rate
         )
-        response.raise_for_status()
-
-        # Extract gold_rate JSON from HTML
-        # Note: The JSON uses escaped quotes \"key\": value
-        match = re.search(r'\\"gold_rate\\":\s*(\[.*?\])', response.text)
-        if match:
-            # Clean the extracted string by unescaping quotes
-            cleaned_json = match.group(1).replace(r"\"", '"')
-            gold_rates = json.loads(cleaned_json)
-
-            for rate in gold_rates:
-                if rate.get("type") == "GOLD" and rate.get("unit") == "G":
-                    purity_str = rate.get("purity")  # e.g., "22 KT", "24 KT"
-                    amount = rate.get("amount")
-
-                    if purity_str and amount:
-                        # Convert "22 KT" -> "22K"
-                        karat = purity_str.replace(" KT", "K").strip()
-                        results["rates"][karat] = str(amount)
+        if fetched.unchanged:
+            return fetched.result
+        array_text = fetched.payload
+
+        if array_text is not None:
+            with metrics.timed("parse_seconds"):
+                results["rates"] = _parse_grt_gold_rates(array_text)
 
             if results["rates"]:
                 results["success"] = True
+                cache.stage(fetched, results)
             else:
                 results["error"] = "No gold rates found in parsed JSON"
         else:
             results["error"] = "Could not find gold_rate JSON in HTML"
 
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         results["error"] = f"Request failed: {str(e)}"
     except json.JSONDecodeError as e:
         results["error"] = f"Failed to parse JSON: {str(e)}"
@@ -459,46 +1068,165 @@ def scrape_grt_gold_price():
     return results
 
 
-def scrape_gold_price():
-    """Main function to scrape gold prices from all sources in parallel."""
-    from concurrent.futures import ThreadPoolExecutor, as_completed
+BOT_EMAIL = "gold-bot@users.noreply.github.com"
+ALLOWED_PURITIES = ["24K", "22K", "18K", "9K"]
 
-    # Define scrapers with their names for error handling
-    scrapers = [
-        # ("Tanishq", scrape_tanishq_gold_price),
-        ("Malabar Gold & Diamonds", scrape_malabar_gold_price),
-        ("GRT Jewels", scrape_grt_gold_price),
-        ("Google", scrape_google_gold_price),
-    ]
 
-    all_results = []
+def _rate_sets(result, today_iso):
+    """Yield (date, region, rates) for a result's headline and regional rates.
+
+    The headline rates are region "" and dated by the result (or today);
+    each regional entry falls back to the result's date.
+    """
+    scraping_date = result.get("date") or today_iso
+    yield scraping_date, "", result.get("rates", {})
+    for region, entry in result.get("regions", {}).items():
+        yield entry.get("date") or scraping_date, region, entry.get("rates", {})
+
+
+def reconcile_prices(results, existing, now_tz):
+    """Return the rows to upsert, keyed by (source, date, purity, region).
+
+    ``existing`` is a PriceStore of the stored rows for the scraped
+    (source, date) pairs. New keys become inserts, changed prices become
+    updates that keep the original created_* columns, and purities a source
+    did not publish are derived from its 24K price. Row dicts are built
+    only for keys that change.
+    """
+    from scraper.price_store import PriceStore
+    from scraper.purity import missing_or_changed
 
-    print("Fetching gold rates from all sources in parallel...")
+    today_iso = now_tz.date().isoformat()
+    now_iso = now_tz.isoformat()
+
+    scraped = PriceStore()
+    price_24k_by_series: dict[tuple[str, str, str], int] = {}
 
-    # Run scrapers in parallel
-    with ThreadPoolExecutor(max_workers=len(scrapers)) as executor:
-        # Submit all scraper tasks
-        future_to_source = {
-            executor.submit(scraper_func): source_name
-            for source_name, scraper_func in scrapers
+    for result in results:
+        source = result["source"]
+        for scraping_date, region, rates in _rate_sets(result, today_iso):
+            for purity, price_val in rates.items():
+                if purity not in ALLOWED_PURITIES:
+                    continue
+                try:
+                    new_price = int(str(price_val).replace(",", "").split(".")[0])
+                except (ValueError, TypeError):
+                    continue
+
+                if purity == "24K":
+                    price_24k_by_series[(source, scraping_date, region)] = new_price
+                scraped.add(source, scraping_date, purity, region, new_price)
+
+    # Purities a source did not publish are derived from its 24K price: 9K
+    # follows 24K, 22K/18K are only filled in when no row exists yet.
+    # Directly scraped keys are skipped, so only stored prices matter here.
+    series = list(price_24k_by_series)
+    for source, scraping_date, purity, region, derived_price in missing_or_changed(
+        [source for source, _, _ in series],
+        [scraping_date for _, scraping_date, _ in series],
+        list(price_24k_by_series.values()),
+        existing,
+        skip=scraped,
+        refresh={"9K"},
+        regions=[region for _, _, region in series],
+    ):
+        scraped.add(source, scraping_date, purity, region, derived_price)
+
+    inserts, updates = existing.diff(scraped)
+    pending: dict[tuple[str, str, str, str], dict] = {}
+    for key, price in inserts:
+        pending[key] = {
+            "source": key[0],
+            "date": key[1],
+            "purity": key[2],
+            "region": key[3],
+            "price_per_gm": price,
+            "created_dt": now_iso,
+            "created_by": BOT_EMAIL,
+            "modified_dt": None,
+            "modified_by": None,
+        }
+    for key, price in updates:
+        created_dt, created_by = existing.created(key)
+        pending[key] = {
+            "source": key[0],
+            "date": key[1],
+            "purity": key[2],
+            "region": key[3],
+            "price_per_gm": price,
+            "created_dt": created_dt,
+            "created_by": created_by,
+            "modified_dt": now_iso,
+            "modified_by": BOT_EMAIL,
         }
+    return pending
+
+
+def scrape_gold_price(sources=None, force=False):
+    """Main function to scrape gold prices from all sources concurrently.
+
+    ``sources`` is a list of registry keys (see scraper.sources) to run
+    instead of every enabled source. Sources whose circuit breaker is open
+    (see scraper.circuit) are skipped unless ``force`` is set. Per-source
+    and per-phase metrics for the run are written even when the run fails
+    part-way.
+    """
+    from scraper.circuit import CircuitBreakers, skipped_result
+    from scraper.sources import select_sources
+
+    breakers = CircuitBreakers.load()
+    specs = []
+    skipped = []
+    for spec in select_sources(sources):
+        if force or breakers.allow(spec.name):
+            specs.append(spec)
+        else:
+            skipped.append(skipped_result(spec.name, breakers.skip(spec.name)))
 
-        # Collect results as they complete
-        for future in as_completed(future_to_source):
-            source_name = future_to_source[future]
-            try:
-                result = future.result()
-                all_results.append(result)
-            except Exception as e:
-                all_results.append(
-                    {
-                        "source": source_name,
-                        "success": False,
-                        "rates": {},
-                        "error": f"Unexpected error: {str(e)}",
-                    }
-                )
+    run_metrics = metrics.start_run()
+    for result in skipped:
+        source_metrics = run_metrics.source(result["source"])
+        source_metrics["outcome"] = "circuit_open"
+        source_metrics["error"] = result["error"]
+    try:
+        return _scrape_and_store(run_metrics, specs, breakers, skipped)
+    finally:
+        run_metrics.finish()
+        try:
+            json_path, _ = run_metrics.write()
+            print(f"Run metrics written to {json_path.parent}")
+        except OSError as e:
+            print(f"Could not write run metrics: {str(e)}")
+
+
+def _scrape_and_store(run_metrics, specs, breakers, skipped):
+    """Scrape the given sources, then reconcile and write what changed."""
+    from scraper.circuit import hedge_delays
+    from scraper.engine import run_sources
+
+    print("Fetching gold rates from all sources concurrently...")
+
+    # Only the selected sources' modules are imported
+    scrapers = [spec.as_scraper() for spec in specs]
+    with run_metrics.phase("scrape"):
+        all_results = run_sources(scrapers, hedge_delays=hedge_delays(specs, breakers))
+
+    # Offline replays say nothing about the live sites' health
+    if not get_response_cache().replay:
+        breakers.record_run(all_results, run_metrics)
+        try:
+            breakers.save()
+        except OSError as e:
+            print(f"Could not save circuit breaker state: {str(e)}")
 
+    return store_results(skipped + all_results, run_metrics)
+
+
+def store_results(all_results, run_metrics):
+    """Report a batch of source results, then reconcile and write what changed.
+
+    Returns ``all_results``.
+    """
     # Display all results
     print("\n" + "=" * 50)
     print("GOLD RATES SUMMARY")
@@ -513,139 +1241,119 @@ def scrape_gold_price():
     successful = sum(1 for r in all_results if r["success"])
     print(f"\nSuccessfully fetched rates from {successful}/{len(all_results)} sources")
 
-    from scraper.db import get_client, upsert_gold_prices
-
-    now_tz = datetime.now(timezone(timedelta(hours=5, minutes=30)))
-    today_iso = now_tz.date().isoformat()
-    now_iso = now_tz.isoformat()
-    bot_email = "gold-bot@users.noreply.github.com"
-
-    allowed_purities = ["24K", "22K", "18K", "9K"]
-    derived_ratios = {"22K": 22 / 24, "18K": 18 / 24}
-
-    client = get_client()
-    existing_rows: dict[tuple[str, str, str], dict] = {}
-    offset = 0
-    page_size = 1000
-    while True:
-        response = (
-            client.table("gold_prices")
-            .select(
-                "source,date,purity,price_per_gm,created_dt,created_by,modified_dt,modified_by"
-            )
-            .range(offset, offset + page_size - 1)
-            .execute()
-        )
-        rows = response.data or []
-        for row in rows:
-            key = (row["source"], row["date"], row["purity"])
-            existing_rows[key] = row
-        if len(rows) < page_size:
-            break
-        offset += page_size
-
-    pending: dict[tuple[str, str, str], dict] = {}
-    price_24k_by_source_date: dict[tuple[str, str], int] = {}
-    directly_scraped: set[tuple[str, str, str]] = set()
-
-    for result in all_results:
-        if not result.get("success"):
-            continue
-        source = result["source"]
-        scraping_date = result.get("date", today_iso)
+    # Sources whose payload matched the cached one have nothing new to write
+    changed_results = [
+        r for r in all_results if r["success"] and not r.get("unchanged")
+    ]
+    unchanged = sum(1 for r in all_results if r.get("unchanged"))
+    if unchanged:
+        print(f"{unchanged} source(s) unchanged since the last run")
 
-        for purity, price_val in result.get("rates", {}).items():
-            if purity not in allowed_purities:
-                continue
-            try:
-                new_price = int(str(price_val).replace(",", "").split(".")[0])
-            except (ValueError, TypeError):
-                continue
+    if not changed_results:
+        return all_results
 
-            key = (source, scraping_date, purity)
-            directly_scraped.add(key)
-            if purity == "24K":
-                price_24k_by_source_date[(source, scraping_date)] = new_price
-
-            if key in existing_rows:
-                if existing_rows[key]["price_per_gm"] != new_price:
-                    row = existing_rows[key]
-                    pending[key] = {
-                        "source": source,
-                        "date": scraping_date,
-                        "purity": purity,
-                        "price_per_gm": new_price,
-                        "created_dt": row["created_dt"],
-                        "created_by": row["created_by"],
-                        "modified_dt": now_iso,
-                        "modified_by": bot_email,
-                    }
-            else:
-                pending[key] = {
-                    "source": source,
-                    "date": scraping_date,
-                    "purity": purity,
-                    "price_per_gm": new_price,
-                    "created_dt": now_iso,
-                    "created_by": bot_email,
-                    "modified_dt": None,
-                    "modified_by": None,
-                }
+    from scraper.rolling_stats import RollingStats, screen_results
 
-    for (source, scraping_date), price_24k in price_24k_by_source_date.items():
-        key = (source, scraping_date, "9K")
-        if key in directly_scraped:
-            continue
+    now_tz = datetime.now(_IST)
+    today_iso = now_tz.date().isoformat()
 
-        price_9k = round(price_24k * (9 / 24))
-        if key in existing_rows:
-            if existing_rows[key]["price_per_gm"] != price_9k:
-                row = existing_rows[key]
-                pending[key] = {
-                    "source": source,
-                    "date": scraping_date,
-                    "purity": "9K",
-                    "price_per_gm": price_9k,
-                    "created_dt": row["created_dt"],
-                    "created_by": row["created_by"],
-                    "modified_dt": now_iso,
-                    "modified_by": bot_email,
-                }
-        else:
-            pending[key] = {
-                "source": source,
-                "date": scraping_date,
-                "purity": "9K",
-                "price_per_gm": price_9k,
-                "created_dt": now_iso,
-                "created_by": bot_email,
-                "modified_dt": None,
-                "modified_by": None,
-            }
+    # Implausible prices (e.g. a misread unit) never reach the ledger
+    rolling_stats = RollingStats.load()
+    rejected = screen_results(changed_results, rolling_stats, today_iso)
+    for message in rejected:
+        print(f"Rejected outlier: {message}")
+    run_metrics.increment("outliers_rejected", len(rejected))
+
+    cache = get_response_cache()
+    if cache.replay:
+        print("Replay mode: skipping Supabase reconciliation.")
+        return all_results
+
+    from scraper.db import (
+        append_ticks,
+        compact_ticks,
+        fetch_gold_prices_for,
+        refresh_rollups,
+        upsert_gold_prices,
+    )
 
-    for (source, scraping_date), price_24k in price_24k_by_source_date.items():
-        for purity, ratio in derived_ratios.items():
-            key = (source, scraping_date, purity)
-            if key in pending or key in existing_rows:
-                continue
-            derived_price = round(price_24k * ratio)
-            pending[key] = {
-                "source": source,
-                "date": scraping_date,
-                "purity": purity,
-                "price_per_gm": derived_price,
-                "created_dt": now_iso,
-                "created_by": bot_email,
-                "modified_dt": None,
-                "modified_by": None,
-            }
+    # Only the (source, date) pairs scraped in this run can be written, so
+    # reconcile against those rows, read from the incrementally synced mirror.
+    with run_metrics.phase("reconcile"):
+        existing = fetch_gold_prices_for(
+            (result["source"], scraping_date)
+            for result in changed_results
+            for scraping_date, _, _ in _rate_sets(result, today_iso)
+        )
+        pending = reconcile_prices(changed_results, existing, now_tz)
+    run_metrics.increment("reconcile_rows_read", len(existing))
 
     if pending:
-        upsert_gold_prices(list(pending.values()))
+        with run_metrics.phase("upsert"):
+            upsert_gold_prices(list(pending.values()))
+        run_metrics.increment("rows_upserted", len(pending))
         print(f"Upserted {len(pending)} gold price record(s) to Supabase.")
+        try:
+            with run_metrics.phase("rollups"):
+                refresh_rollups(row["date"] for row in pending.values())
+        except Exception as e:
+            # The ledger write succeeded; rollups catch up on the next refresh
+            print(f"Could not refresh price rollups: {str(e)}")
+
+    rolling_stats.observe_results(changed_results, today_iso)
+    try:
+        rolling_stats.save()
+    except OSError as e:
+        print(f"Could not save rolling price statistics: {str(e)}")
+
+    ticks = [
+        {"source": result["source"], **tick}
+        for result in changed_results
+        for tick in result.get("ticks", ())
+    ]
+    if ticks:
+        try:
+            with run_metrics.phase("ticks"):
+                appended = append_ticks(ticks)
+                if appended:
+                    compact_ticks()
+            run_metrics.increment("ticks_appended", appended)
+            if appended:
+                print(f"Appended {appended} intraday tick(s).")
+        except Exception as e:
+            # Unsent ticks are retried the next time the source's payload changes
+            print(f"Could not append intraday ticks: {str(e)}")
+
+    cache.commit()
+
+    from scraper.snapshots import publish_snapshots
+
+    with run_metrics.phase("snapshots"):
+        changed_snapshots = publish_snapshots()
+    if changed_snapshots:
+        print(f"Published {len(changed_snapshots)} dashboard snapshot file(s).")
 
     return all_results
 
 
 if __name__ == "__main__":
-    scrape_gold_price()
+    import argparse
+
+    from scraper.sources import add_source_argument, print_sources, select_sources
+
+    parser = argparse.ArgumentParser(description="Scrape gold prices once.")
+    add_source_argument(parser)
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="run sources even while their circuit breaker is open",
+    )
+    args = parser.parse_args()
+    if args.list_sources:
+        print_sources()
+    else:
+        try:
+            select_sources(args.sources)
+        except ValueError as e:
+            parser.error(str(e))
+        scrape_gold_price(args.sources, force=args.force)
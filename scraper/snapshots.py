@@ -0,0 +1,146 @@
+"""Publish compact, pre-aggregated snapshots of gold_prices for the dashboard.
+
+One file per purity and range (``{purity}-{range}.json``) holds that slice
+in a columnar layout: parallel arrays sorted by date then source, with
+sources dictionary-encoded. ``summary.json`` carries the per-purity stats
+cards. Files are only rewritten when their content changes, and the
+repetitive columns compress well under the gzip GitHub Pages applies.
+"""
+
+import json
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+SNAPSHOT_DIR = Path(__file__).resolve().parent.parent / "docs" / "data" / "snapshots"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_PURITIES = ("24K", "22K", "18K", "9K")
+SNAPSHOT_RANGES = ("this-month", "last-month", "this-year", "all")
+
+
+def _today_ist() -> date:
+    return datetime.now(timezone(timedelta(hours=5, minutes=30))).date()
+
+
+def range_bounds(range_name: str, today: date) -> tuple[str | None, str | None]:
+    """Inclusive ISO (start, end) dates for a dashboard range; None is open."""
+    if range_name == "this-month":
+        return today.replace(day=1).isoformat(), None
+    if range_name == "last-month":
+        last_day = today.replace(day=1) - timedelta(days=1)
+        return last_day.replace(day=1).isoformat(), last_day.isoformat()
+    if range_name == "this-year":
+        return today.replace(month=1, day=1).isoformat(), None
+    return None, None
+
+
+def build_snapshot(rows: list[dict], purity: str, range_name: str, today: date):
+    """Columnar snapshot of one purity's rows (pre-sorted by date, source)."""
+    start, end = range_bounds(range_name, today)
+    sources: list[str] = []
+    source_index: dict[str, int] = {}
+    columns = {
+        "date": [],
+        "source": [],
+        "price_per_gm": [],
+        "created_dt": [],
+        "modified_dt": [],
+    }
+    for row in rows:
+        if (start and row["date"] < start) or (end and row["date"] > end):
+            continue
+        if row["source"] not in source_index:
+            source_index[row["source"]] = len(sources)
+            sources.append(row["source"])
+        columns["date"].append(row["date"])
+        columns["source"].append(source_index[row["source"]])
+        columns["price_per_gm"].append(row["price_per_gm"])
+        columns["created_dt"].append(row["created_dt"])
+        columns["modified_dt"].append(row["modified_dt"])
+    return {
+        "version": SNAPSHOT_VERSION,
+        "purity": purity,
+        "range": range_name,
+        "sources": sources,
+        **columns,
+    }
+
+
+def build_summary(rows_by_purity: dict[str, list[dict]], today: date) -> dict:
+    """Stats cards per purity: latest price and 30-day high/low."""
+    since = (today - timedelta(days=30)).isoformat()
+    purities = {}
+    for purity, rows in rows_by_purity.items():
+        if not rows:
+            continue
+        latest_date = rows[-1]["date"]
+        # Highest price among the sources reporting on the latest date
+        current = max(
+            (row for row in rows if row["date"] == latest_date),
+            key=lambda row: row["price_per_gm"],
+        )
+        recent = [row for row in rows if row["date"] >= since]
+        stats = {
+            "current": {
+                "date": current["date"],
+                "source": current["source"],
+                "price_per_gm": current["price_per_gm"],
+                "updated_dt": current["modified_dt"] or current["created_dt"],
+            },
+            "high_30d": None,
+            "low_30d": None,
+        }
+        if recent:
+            stats["high_30d"] = max(row["price_per_gm"] for row in recent)
+            stats["low_30d"] = min(row["price_per_gm"] for row in recent)
+        purities[purity] = stats
+    return {
+        "version": SNAPSHOT_VERSION,
+        "as_of": today.isoformat(),
+        "purities": purities,
+    }
+
+
+def _write_if_changed(path: Path, document: dict) -> bool:
+    content = json.dumps(document, separators=(",", ":"), ensure_ascii=False)
+    if path.is_file() and path.read_text(encoding="utf-8") == content:
+        return False
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(content, encoding="utf-8")
+    tmp_path.replace(path)
+    return True
+
+
+def publish_snapshots(
+    output_dir: Path = SNAPSHOT_DIR, today: date | None = None
+) -> list[Path]:
+    """Write every snapshot from the local mirror; return the files changed.
+
+    Snapshots cover each source's headline prices (region "").
+    """
+    from scraper.db import SELECT_COLUMNS, TABLE_NAME, read_mirror
+
+    today = today or _today_ist()
+    rows_by_purity: dict[str, list[dict]] = {p: [] for p in SNAPSHOT_PURITIES}
+    for row in read_mirror(
+        f"select {SELECT_COLUMNS} from {TABLE_NAME} "
+        "where region = '' order by date, source"
+    ):
+        if row["purity"] in rows_by_purity:
+            rows_by_purity[row["purity"]].append(row)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    changed = []
+    for purity, rows in rows_by_purity.items():
+        for range_name in SNAPSHOT_RANGES:
+            path = output_dir / f"{purity}-{range_name}.json"
+            if _write_if_changed(path, build_snapshot(rows, purity, range_name, today)):
+                changed.append(path)
+    summary_path = output_dir / "summary.json"
+    if _write_if_changed(summary_path, build_summary(rows_by_purity, today)):
+        changed.append(summary_path)
+    return changed
+
+
+if __name__ == "__main__":
+    changed = publish_snapshots()
+    print(f"Published {len(changed)} changed snapshot file(s) to {SNAPSHOT_DIR}")
@@ -0,0 +1,159 @@
+"""Registry of scraper sources.
+
+Each source is declared once as a SourceSpec: a short key for the command
+line, its transport, the callable that scrapes it (as a ``module:function``
+path imported only when the source is selected), the packages it needs
+and its daemon schedule. Other packages can add sources through the
+``svarna_ledger.sources`` entry point group; each entry point loads a
+SourceSpec (or a list of them).
+"""
+
+import importlib
+import importlib.util
+from dataclasses import dataclass
+from importlib.metadata import entry_points
+
+from scraper.engine import BROWSER_SOURCE_TIMEOUT, DEFAULT_SOURCE_TIMEOUT
+
+ENTRY_POINT_GROUP = "svarna_ledger.sources"
+
+
+@dataclass(frozen=True)
+class Schedule:
+    """Daemon polling intervals in seconds."""
+
+    market_interval: float
+    off_hours_interval: float
+
+
+DEFAULT_SCHEDULE = Schedule(market_interval=30 * 60, off_hours_interval=3 * 60 * 60)
+
+
+@dataclass(frozen=True)
+class SourceSpec:
+    key: str
+    name: str
+    target: str
+    transport: str = "http"
+    timeout: float = DEFAULT_SOURCE_TIMEOUT
+    # Packages the source cannot run without, and ones only a fallback uses
+    requires: tuple[str, ...] = ()
+    optional: tuple[str, ...] = ()
+    schedule: Schedule = DEFAULT_SCHEDULE
+    enabled: bool = True
+
+    def missing_requirements(self, optional: bool = False) -> list[str]:
+        """Required (or optional) top-level packages that are not installed."""
+        names = self.optional if optional else self.requires
+        return [name for name in names if importlib.util.find_spec(name) is None]
+
+    def load(self):
+        """Import and return the scrape callable."""
+        module_name, _, attr = self.target.partition(":")
+        return getattr(importlib.import_module(module_name), attr)
+
+    def as_scraper(self):
+        """The (name, func, timeout) tuple the engine runs."""
+        return self.name, self.load(), self.timeout
+
+
+BUILTIN_SOURCES = [
+    SourceSpec(
+        key="tanishq",
+        name="Tanishq",
+        target="scraper.scrape_gold:scrape_tanishq_gold_price",
+    ),
+    SourceSpec(
+        key="malabar",
+        name="Malabar Gold & Diamonds",
+        target="scraper.scrape_gold:scrape_malabar_gold_price",
+    ),
+    SourceSpec(
+        key="grt",
+        name="GRT Jewels",
+        target="scraper.scrape_gold:scrape_grt_gold_price",
+    ),
+    # Plain HTTP first; Selenium is only imported for the browser fallback
+    SourceSpec(
+        key="google",
+        name="Google",
+        target="scraper.scrape_gold:scrape_google_gold_price",
+        transport="http+browser",
+        timeout=BROWSER_SOURCE_TIMEOUT,
+        optional=("selenium",),
+        # A browser run is costly, so poll it less
+        schedule=Schedule(market_interval=60 * 60, off_hours_interval=6 * 60 * 60),
+    ),
+]
+
+
+def registered_sources() -> list[SourceSpec]:
+    """Built-in sources followed by any installed through entry points."""
+    specs = list(BUILTIN_SOURCES)
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        loaded = entry_point.load()
+        specs.extend(loaded if isinstance(loaded, (list, tuple)) else [loaded])
+    return specs
+
+
+def select_sources(keys=None) -> list[SourceSpec]:
+    """Resolve source keys (or names) to specs, in the order given.
+
+    With no keys, every enabled source whose required packages are
+    installed is selected. Unknown keys, and explicitly chosen sources with
+    missing packages, raise ValueError.
+    """
+    specs = registered_sources()
+    if not keys:
+        selected = []
+        for spec in specs:
+            missing = spec.missing_requirements()
+            if spec.enabled and missing:
+                print(f"Skipping {spec.name}: missing {', '.join(missing)}")
+            elif spec.enabled:
+                selected.append(spec)
+        return selected
+
+    by_key = {}
+    for spec in specs:
+        by_key[spec.key.lower()] = spec
+        by_key[spec.name.lower()] = spec
+    unknown = [key for key in keys if key.lower() not in by_key]
+    if unknown:
+        available = ", ".join(spec.key for spec in specs)
+        raise ValueError(
+            f"Unknown source(s): {', '.join(unknown)} (available: {available})"
+        )
+    selected = list(dict.fromkeys(by_key[key.lower()] for key in keys))
+    for spec in selected:
+        missing = spec.missing_requirements()
+        if missing:
+            raise ValueError(
+                f"Source {spec.key} needs missing package(s): {', '.join(missing)}"
+            )
+    return selected
+
+
+def add_source_argument(parser) -> None:
+    """Add the shared --sources option to an argparse parser."""
+    parser.add_argument(
+        "--sources",
+        type=lambda value: [key.strip() for key in value.split(",") if key.strip()],
+        help="comma-separated source keys to run (default: all enabled), "
+        "e.g. malabar,grt",
+    )
+    parser.add_argument(
+        "--list-sources", action="store_true", help="list registered sources and exit"
+    )
+
+
+def print_sources() -> None:
+    for spec in registered_sources():
+        status = "enabled" if spec.enabled else "disabled"
+        missing = spec.missing_requirements()
+        if missing:
+            status += f", missing {', '.join(missing)}"
+        missing_optional = spec.missing_requirements(optional=True)
+        if missing_optional:
+            status += f", fallback needs {', '.join(missing_optional)}"
+        print(f"{spec.key:<10} {spec.name:<26} {spec.transport:<13} {status}")
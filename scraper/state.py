@@ -0,0 +1,57 @@
+"""On-disk state kept by the scraper between runs (cookies, caches, ...)."""
+
+import os
+from http.cookiejar import LWPCookieJar
+from pathlib import Path
+
+import httpx
+
+_DEFAULT_STATE_DIR = Path(__file__).resolve().parent / ".state"
+
+
+def state_path(name: str) -> Path:
+    """Return the path of a state file, creating the state directory.
+
+    The directory defaults to ``scraper/.state`` and can be moved with
+    ``SCRAPER_STATE_DIR`` (the GitHub workflow caches it between runs).
+    """
+    state_dir = Path(os.environ.get("SCRAPER_STATE_DIR") or _DEFAULT_STATE_DIR)
+    state_dir.mkdir(parents=True, exist_ok=True)
+    return state_dir / name
+
+
+def load_cookies(client: httpx.AsyncClient, path: Path) -> int:
+    """Load saved cookies into the client's jar; return how many were loaded.
+
+    Expired cookies are dropped, so a stale file loads nothing.
+    """
+    if not path.is_file():
+        return 0
+    jar = LWPCookieJar(str(path))
+    try:
+        jar.load(ignore_discard=True)
+    except (OSError, ValueError):
+        return 0
+    jar.clear_expired_cookies()
+    loaded = 0
+    for cookie in jar:
+        client.cookies.jar.set_cookie(cookie)
+        loaded += 1
+    return loaded
+
+
+def save_cookies(client: httpx.AsyncClient, path: Path, domain: str) -> None:
+    """Save the client's cookies for ``domain`` (and its subdomains)."""
+    jar = LWPCookieJar(str(path))
+    for cookie in client.cookies.jar:
+        if cookie.domain.lstrip(".").endswith(domain):
+            jar.set_cookie(cookie)
+    jar.save(ignore_discard=True)
+
+
+def clear_cookies(client: httpx.AsyncClient, path: Path, domain: str) -> None:
+    """Forget saved and in-memory cookies for ``domain``."""
+    for cookie in list(client.cookies.jar):
+        if cookie.domain.lstrip(".").endswith(domain):
+            client.cookies.jar.clear(cookie.domain, cookie.path, cookie.name)
+    path.unlink(missing_ok=True)
@@ -2,6 +2,8 @@ import json
 import os
 from datetime import datetime
 
+from scraper.purity import missing_or_changed
+
 
 def backfill_prices():
     candidates = [
@@ -22,67 +24,34 @@ def backfill_prices():
     with open(json_path, "r") as f:
         data = json.load(f)
 
-    existing_entries = set()
-    for entry in data:
-        existing_entries.add((entry["source"], entry["date"], entry["purity"]))
+    known_prices = {
+        (entry["source"], entry["date"], entry["purity"]): entry["price_per_gm"]
+        for entry in data
+    }
+    entries_24k = [entry for entry in data if entry["purity"] == "24K"]
 
-    new_entries = []
     current_dt = datetime.now().isoformat()
     default_user = "gold-bot@users.noreply.github.com"
 
-    for entry in data:
-        if entry["purity"] == "24K":
-            source = entry["source"]
-            date = entry["date"]
-            price_24k = entry["price_per_gm"]
-
-            if (source, date, "22K") not in existing_entries:
-                price_22k = round(price_24k * (22 / 24))
-                new_entries.append(
-                    {
-                        "source": source,
-                        "date": date,
-                        "purity": "22K",
-                        "price_per_gm": price_22k,
-                        "created_dt": current_dt,
-                        "created_by": default_user,
-                        "modified_dt": None,
-                        "modified_by": None,
-                    }
-                )
-                existing_entries.add((source, date, "22K"))
-
-            if (source, date, "18K") not in existing_entries:
-                price_18k = round(price_24k * (18 / 24))
-                new_entries.append(
-                    {
-                        "source": source,
-                        "date": date,
-                        "purity": "18K",
-                        "price_per_gm": price_18k,
-                        "created_dt": current_dt,
-                        "created_by": default_user,
-                        "modified_dt": None,
-                        "modified_by": None,
-                    }
-                )
-                existing_entries.add((source, date, "18K"))
-
-            if (source, date, "9K") not in existing_entries:
-                price_9k = round(price_24k * (9 / 24))
-                new_entries.append(
-                    {
-                        "source": source,
-                        "date": date,
-                        "purity": "9K",
-                        "price_per_gm": price_9k,
-                        "created_dt": current_dt,
-                        "created_by": default_user,
-                        "modified_dt": None,
-                        "modified_by": None,
-                    }
-                )
-                existing_entries.add((source, date, "9K"))
+    # Fill in every missing 22K/18K/9K row from its 24K price in one batch
+    new_entries = [
+        {
+            "source": source,
+            "date": date,
+            "purity": purity,
+            "price_per_gm": price,
+            "created_dt": current_dt,
+            "created_by": default_user,
+            "modified_dt": None,
+            "modified_by": None,
+        }
+        for source, date, purity, price in missing_or_changed(
+            [entry["source"] for entry in entries_24k],
+            [entry["date"] for entry in entries_24k],
+            [entry["price_per_gm"] for entry in entries_24k],
+            known_prices,
+        )
+    ]
 
     if new_entries:
         data.extend(new_entries)
@@ -1,15 +1,55 @@
-"""One-time migration: import gold_prices.json into Supabase."""
+"""One-time migration: import gold_prices.json into Supabase.
 
+Rows are split into payload-sized chunks (see scraper.db.iter_chunks) and
+sent several at a time. Finished chunks are recorded in a checkpoint file,
+so an interrupted run resumes where it stopped; pass --restart to ignore it.
+"""
+
+import argparse
+import hashlib
 import json
 import os
 import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from scraper.db import (
+    UPSERT_CONCURRENCY,
+    UPSERT_MAX_BYTES,
+    UPSERT_MAX_ROWS,
+    iter_chunks,
+    mirror_upsert,
+    refresh_rollups,
+    upsert_chunk,
+)
+
+CHECKPOINT_PATH = os.path.join(os.path.dirname(__file__), ".migrate_checkpoint.json")
+
 
-from scraper.db import upsert_gold_prices
+def _load_checkpoint(run_id):
+    """Return the chunk indexes already loaded for this input and chunking."""
+    try:
+        with open(CHECKPOINT_PATH, encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return set()
+    if checkpoint.get("run_id") != run_id:
+        return set()
+    return set(checkpoint.get("completed", []))
 
-BATCH_SIZE = 100
 
+def _save_checkpoint(run_id, completed):
+    tmp_path = CHECKPOINT_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"run_id": run_id, "completed": sorted(completed)}, f)
+    os.replace(tmp_path, CHECKPOINT_PATH)
 
-def migrate():
+
+def migrate(
+    max_rows=UPSERT_MAX_ROWS,
+    max_bytes=UPSERT_MAX_BYTES,
+    concurrency=UPSERT_CONCURRENCY,
+    restart=False,
+):
     candidates = [
         os.path.join(os.path.dirname(__file__), "gold_prices_seed.json"),
         os.path.join(
@@ -25,8 +65,9 @@ def migrate():
         print(f"Error: {json_path} not found.")
         sys.exit(1)
 
-    with open(json_path, encoding="utf-8") as f:
-        data = json.load(f)
+    with open(json_path, "rb") as f:
+        raw = f.read()
+    data = json.loads(raw)
 
     rows = []
     for entry in data:
@@ -35,6 +76,7 @@ def migrate():
                 "source": entry["source"],
                 "date": entry["date"],
                 "purity": entry["purity"],
+                "region": entry.get("region", ""),
                 "price_per_gm": entry["price_per_gm"],
                 "created_dt": entry["created_dt"],
                 "created_by": entry["created_by"],
@@ -44,13 +86,64 @@ def migrate():
         )
 
     total = len(rows)
-    for i in range(0, total, BATCH_SIZE):
-        batch = rows[i : i + BATCH_SIZE]
-        upsert_gold_prices(batch)
-        print(f"Upserted {min(i + BATCH_SIZE, total)}/{total}")
+    chunks = list(iter_chunks(rows, max_rows=max_rows, max_bytes=max_bytes))
+    # A checkpoint only applies to the same input split the same way
+    run_id = hashlib.sha256(raw + f"|{max_rows}|{max_bytes}".encode()).hexdigest()
+    completed = set() if restart else _load_checkpoint(run_id)
+    remaining = [i for i in range(len(chunks)) if i not in completed]
+    done_rows = sum(len(chunks[i]) for i in completed)
+    if completed:
+        print(f"Resuming: {done_rows}/{total} rows already upserted")
+
+    # At most `concurrency` chunks are in flight, so a failure or Ctrl-C
+    # leaves nothing queued behind it to upload unrecorded.
+    workers = max(1, concurrency)
+    queue = iter(remaining)
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = {}
+        for index in queue:
+            futures[executor.submit(upsert_chunk, chunks[index])] = index
+            if len(futures) >= workers:
+                break
+        while futures:
+            finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in finished:
+                index = futures.pop(future)
+                future.result()
+                completed.add(index)
+                _save_checkpoint(run_id, completed)
+                done_rows += len(chunks[index])
+                print(f"Upserted {done_rows}/{total}")
+                next_index = next(queue, None)
+                if next_index is not None:
+                    futures[executor.submit(upsert_chunk, chunks[next_index])] = (
+                        next_index
+                    )
+    except BaseException:
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
 
+    mirror_upsert(rows)
+    refresh_rollups(row["date"] for row in rows)
+    if os.path.exists(CHECKPOINT_PATH):
+        os.remove(CHECKPOINT_PATH)
     print(f"Migration complete: {total} rows upserted.")
 
 
 if __name__ == "__main__":
-    migrate()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-rows", type=int, default=UPSERT_MAX_ROWS)
+    parser.add_argument("--max-bytes", type=int, default=UPSERT_MAX_BYTES)
+    parser.add_argument("--concurrency", type=int, default=UPSERT_CONCURRENCY)
+    parser.add_argument(
+        "--restart", action="store_true", help="ignore any saved checkpoint"
+    )
+    args = parser.parse_args()
+    migrate(
+        max_rows=args.max_rows,
+        max_bytes=args.max_bytes,
+        concurrency=args.concurrency,
+        restart=args.restart,
+    )
@@ -0,0 +1,80 @@
+-- Daily and monthly min/max/avg rollups of gold_prices, per purity and source.
+-- source = '' holds the rollup across all sources for that bucket.
+create table public.gold_price_rollups (
+  granularity text not null check (granularity in ('day', 'month')),
+  bucket date not null,
+  purity text not null,
+  source text not null,
+  min_price integer not null,
+  max_price integer not null,
+  avg_price numeric(12, 2) not null,
+  sample_count integer not null,
+  refreshed_at timestamptz not null default now(),
+  primary key (granularity, purity, source, bucket)
+);
+
+create index gold_price_rollups_bucket_idx
+  on public.gold_price_rollups (granularity, bucket desc);
+
+alter table public.gold_price_rollups enable row level security;
+
+create policy "gold_price_rollups_public_read"
+  on public.gold_price_rollups for select
+  to anon, authenticated
+  using (true);
+
+-- Recompute only the day buckets in p_dates and the month buckets containing
+-- them. The scraper calls this after each upsert with the dates it wrote.
+create or replace function public.refresh_gold_price_rollups(p_dates date[])
+returns integer
+language plpgsql
+as $$
+declare
+  v_months date[];
+  v_first date;
+  v_end date;
+  v_rows integer;
+begin
+  select coalesce(array_agg(distinct date_trunc('month', d)::date), '{}'),
+         min(date_trunc('month', d)::date),
+         (max(date_trunc('month', d)) + interval '1 month')::date
+    into v_months, v_first, v_end
+    from unnest(p_dates) as d;
+
+  delete from public.gold_price_rollups
+   where (granularity = 'day' and bucket = any (p_dates))
+      or (granularity = 'month' and bucket = any (v_months));
+
+  insert into public.gold_price_rollups
+    (granularity, bucket, purity, source, min_price, max_price, avg_price, sample_count)
+  select 'day', date, purity, coalesce(source, ''),
+         min(price_per_gm), max(price_per_gm), round(avg(price_per_gm), 2), count(*)
+    from public.gold_prices
+   where date = any (p_dates)
+   group by grouping sets ((date, purity, source), (date, purity))
+  union all
+  select 'month', date_trunc('month', date)::date, purity, coalesce(source, ''),
+         min(price_per_gm), max(price_per_gm), round(avg(price_per_gm), 2), count(*)
+    from public.gold_prices
+   where date >= v_first and date < v_end
+     and date_trunc('month', date)::date = any (v_months)
+   group by grouping sets (
+     (date_trunc('month', date)::date, purity, source),
+     (date_trunc('month', date)::date, purity)
+   );
+
+  get diagnostics v_rows = row_count;
+  return v_rows;
+end;
+$$;
+
+-- Only the service role (scraper) may trigger a refresh.
+revoke execute on function public.refresh_gold_price_rollups(date[])
+  from public, anon, authenticated;
+grant execute on function public.refresh_gold_price_rollups(date[])
+  to service_role;
+
+-- Backfill every bucket once.
+select public.refresh_gold_price_rollups(
+  array(select distinct date from public.gold_prices)
+);
@@ -0,0 +1,66 @@
+-- Regional prices: region is a state or city, '' being a source's headline
+-- price (every row written before this migration).
+alter table public.gold_prices
+  add column region text not null default '';
+
+alter table public.gold_prices
+  drop constraint gold_prices_source_date_purity_key;
+
+alter table public.gold_prices
+  add constraint gold_prices_source_date_purity_region_key
+  unique (source, date, purity, region);
+
+create index gold_prices_region_date_idx
+  on public.gold_prices (region, date desc);
+
+-- Rollups stay per source, over headline prices only, so regional rows do
+-- not skew the cross-source averages.
+create or replace function public.refresh_gold_price_rollups(p_dates date[])
+returns integer
+language plpgsql
+as $$
+declare
+  v_months date[];
+  v_first date;
+  v_end date;
+  v_rows integer;
+begin
+  select coalesce(array_agg(distinct date_trunc('month', d)::date), '{}'),
+         min(date_trunc('month', d)::date),
+         (max(date_trunc('month', d)) + interval '1 month')::date
+    into v_months, v_first, v_end
+    from unnest(p_dates) as d;
+
+  delete from public.gold_price_rollups
+   where (granularity = 'day' and bucket = any (p_dates))
+      or (granularity = 'month' and bucket = any (v_months));
+
+  insert into public.gold_price_rollups
+    (granularity, bucket, purity, source, min_price, max_price, avg_price, sample_count)
+  select 'day', date, purity, coalesce(source, ''),
+         min(price_per_gm), max(price_per_gm), round(avg(price_per_gm), 2), count(*)
+    from public.gold_prices
+   where date = any (p_dates)
+     and region = ''
+   group by grouping sets ((date, purity, source), (date, purity))
+  union all
+  select 'month', date_trunc('month', date)::date, purity, coalesce(source, ''),
+         min(price_per_gm), max(price_per_gm), round(avg(price_per_gm), 2), count(*)
+    from public.gold_prices
+   where date >= v_first and date < v_end
+     and date_trunc('month', date)::date = any (v_months)
+     and region = ''
+   group by grouping sets (
+     (date_trunc('month', date)::date, purity, source),
+     (date_trunc('month', date)::date, purity)
+   );
+
+  get diagnostics v_rows = row_count;
+  return v_rows;
+end;
+$$;
+
+revoke execute on function public.refresh_gold_price_rollups(date[])
+  from public, anon, authenticated;
+grant execute on function public.refresh_gold_price_rollups(date[])
+  to service_role;
@@ -0,0 +1,124 @@
+-- Append-only intraday ticks: every distinct (time, price) a source
+-- publishes during the day, keyed by when the source says it took effect.
+create table public.gold_price_ticks (
+  source text not null,
+  region text not null default '',
+  purity text not null check (purity in ('24K', '22K', '18K', '9K')),
+  observed_at timestamptz not null,
+  price_per_gm integer not null,
+  created_dt timestamptz not null default now(),
+  primary key (source, region, purity, observed_at)
+);
+
+create index gold_price_ticks_observed_at_idx
+  on public.gold_price_ticks (observed_at);
+
+alter table public.gold_price_ticks enable row level security;
+
+create policy "gold_price_ticks_public_read"
+  on public.gold_price_ticks for select
+  to anon, authenticated
+  using (true);
+
+-- Hourly and daily open/high/low/close of compacted ticks. Buckets start on
+-- IST hour and day boundaries.
+create table public.gold_price_tick_rollups (
+  granularity text not null check (granularity in ('hour', 'day')),
+  bucket timestamptz not null,
+  source text not null,
+  region text not null,
+  purity text not null,
+  open_price integer not null,
+  high_price integer not null,
+  low_price integer not null,
+  close_price integer not null,
+  first_at timestamptz not null,
+  last_at timestamptz not null,
+  tick_count integer not null,
+  primary key (granularity, source, region, purity, bucket)
+);
+
+create index gold_price_tick_rollups_bucket_idx
+  on public.gold_price_tick_rollups (granularity, bucket desc);
+
+alter table public.gold_price_tick_rollups enable row level security;
+
+create policy "gold_price_tick_rollups_public_read"
+  on public.gold_price_tick_rollups for select
+  to anon, authenticated
+  using (true);
+
+-- Move ticks older than p_raw_retention (whole IST days) into the rollups
+-- and delete them, then drop hourly rollups older than p_hourly_retention.
+-- Daily rollups are kept. Each call only touches ticks that aged out since
+-- the previous one; late ticks for an already compacted bucket are merged.
+-- The scraper calls this after appending ticks.
+create or replace function public.compact_gold_price_ticks(
+  p_raw_retention interval default interval '14 days',
+  p_hourly_retention interval default interval '180 days'
+)
+returns integer
+language plpgsql
+as $$
+declare
+  v_cutoff timestamptz;
+  v_rows integer;
+begin
+  v_cutoff := date_trunc('day', (now() - p_raw_retention) at time zone 'Asia/Kolkata')
+              at time zone 'Asia/Kolkata';
+
+  with aged as (
+    delete from public.gold_price_ticks
+     where observed_at < v_cutoff
+    returning source, region, purity, observed_at, price_per_gm
+  ), bucketed as (
+    select 'hour' as granularity,
+           date_trunc('hour', observed_at at time zone 'Asia/Kolkata')
+             at time zone 'Asia/Kolkata' as bucket,
+           aged.*
+      from aged
+    union all
+    select 'day',
+           date_trunc('day', observed_at at time zone 'Asia/Kolkata')
+             at time zone 'Asia/Kolkata',
+           aged.*
+      from aged
+  )
+  insert into public.gold_price_tick_rollups
+    (granularity, bucket, source, region, purity, open_price, high_price,
+     low_price, close_price, first_at, last_at, tick_count)
+  select granularity, bucket, source, region, purity,
+         (array_agg(price_per_gm order by observed_at))[1],
+         max(price_per_gm), min(price_per_gm),
+         (array_agg(price_per_gm order by observed_at desc))[1],
+         min(observed_at), max(observed_at), count(*)
+    from bucketed
+   group by granularity, bucket, source, region, purity
+  on conflict (granularity, source, region, purity, bucket) do update set
+    open_price = case when excluded.first_at < gold_price_tick_rollups.first_at
+                      then excluded.open_price
+                      else gold_price_tick_rollups.open_price end,
+    close_price = case when excluded.last_at > gold_price_tick_rollups.last_at
+                       then excluded.close_price
+                       else gold_price_tick_rollups.close_price end,
+    high_price = greatest(gold_price_tick_rollups.high_price, excluded.high_price),
+    low_price = least(gold_price_tick_rollups.low_price, excluded.low_price),
+    first_at = least(gold_price_tick_rollups.first_at, excluded.first_at),
+    last_at = greatest(gold_price_tick_rollups.last_at, excluded.last_at),
+    tick_count = gold_price_tick_rollups.tick_count + excluded.tick_count;
+
+  get diagnostics v_rows = row_count;
+
+  delete from public.gold_price_tick_rollups
+   where granularity = 'hour'
+     and bucket < now() - p_hourly_retention;
+
+  return v_rows;
+end;
+$$;
+
+-- Only the service role (scraper) may compact.
+revoke execute on function public.compact_gold_price_ticks(interval, interval)
+  from public, anon, authenticated;
+grant execute on function public.compact_gold_price_ticks(interval, interval)
+  to service_role;
@@ -0,0 +1,23 @@
+-- Server-side write time, the watermark incremental mirror syncs page from.
+-- created_dt/modified_dt are set by the writer and can be back-dated (e.g.
+-- by the one-time import), so they cannot tell what changed since a sync.
+alter table public.gold_prices
+  add column updated_at timestamptz not null default now();
+
+create index gold_prices_updated_at_idx
+  on public.gold_prices (updated_at);
+
+create or replace function public.set_gold_prices_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+  new.updated_at := now();
+  return new;
+end;
+$$;
+
+create trigger gold_prices_set_updated_at
+  before update on public.gold_prices
+  for each row
+  execute function public.set_gold_prices_updated_at();